@@ -18,6 +18,9 @@ class Settings(BaseSettings):
     
     # AkShare 设置
     akshare_timeout: int = 30
+
+    # 阻塞任务线程池大小（pandas / akshare / 模板渲染）
+    executor_workers: int = 4
     
     class Config:
         env_file = ".env"
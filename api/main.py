@@ -1,13 +1,37 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from loguru import logger
+
 from api.config.settings import settings
-from api.routers import slides, data
+from api.routers import data, slides
+from api.services.data_service import FETCH_ERRORS
+from api.services.executor import blocking
+from api.services.snapshot import current_snapshot
+from myslide.jinja_env import validate_templates
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 模板有语法错误时直接启动失败
+    validate_templates()
+    # 启动时预热行情快照，失败不影响启动，首个请求会再次尝试
+    try:
+        await current_snapshot()
+    except FETCH_ERRORS as e:
+        logger.warning(f"行情快照预热失败: {e}")
+    yield
+    blocking.shutdown()
+
 
 app = FastAPI(
     title=settings.app_title,
     description=settings.app_description,
     version=settings.app_version,
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # CORS中间件配置
@@ -18,6 +42,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 大列表响应压缩，小响应不压缩
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # 注册路由
 app.include_router(slides.router, prefix="/api/slides", tags=["slides"])
@@ -29,4 +55,9 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "version": settings.app_version}
\ No newline at end of file
+    return {"status": "healthy", "version": settings.app_version}
+
+@app.get("/metrics")
+async def metrics():
+    """阻塞任务线程池的排队深度与饱和度"""
+    return {"executor": blocking.metrics()}
\ No newline at end of file
@@ -1,6 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from typing import Annotated
+
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+
 from api.models.slide_models import MarketSummary
-from api.services.data_service import DataService
+from api.services.data_service import FETCH_ERRORS, DataService, normalize_code
+from api.services.executor import blocking
+from api.services.serializers import DOUBLE_PRECISION, SHAPES, FrameResponse
+from api.services.snapshot import MarketSnapshot, current_snapshot, snapshot_store
 
 router = APIRouter()
 
@@ -9,24 +17,88 @@ router = APIRouter()
 async def get_market_summary():
     """获取市场概要数据"""
     try:
-        raw_df = DataService.fetch_stock_data()
-        clean_df = DataService.clean_stock_data(raw_df)
-        summary = DataService.get_market_summary(clean_df)
+        snap = await current_snapshot()
+        summary = await blocking.run(DataService.get_market_summary, snap.clean, key=("summary", snap.version))
         return summary
-    except Exception as e:
+    except FETCH_ERRORS as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 字段别名，兼容清洗后数据中的列名
+FIELD_ALIASES = {"市盈率": "市盈率-动态"}
+DEFAULT_FIELDS = "代码,名称,最新价,涨跌幅,成交额,总市值,市盈率"
+SHAPE_PATTERN = "^(" + "|".join(SHAPES) + ")$"
+
+
+def _field(name: str) -> str:
+    name = name.strip()
+    return FIELD_ALIASES.get(name, name)
+
+
+def _sort_spec(sort: str) -> str:
+    keys = [k.strip() for k in sort.split(",") if k.strip()]
+    return ",".join(("-" if k.startswith("-") else "") + _field(k.lstrip("-")) for k in keys)
+
+
+def _parse_range(spec: str) -> tuple[str, tuple[float | None, float | None]]:
+    """'总市值:1e10:5e10'，上下限可留空，如 '市盈率::30'"""
+    parts = spec.split(":")
+    if len(parts) != 3:
+        raise ValueError(f"区间格式应为 列名:下限:上限, 收到 {spec}")
+    col, lo, hi = parts
+    return _field(col), (float(lo) if lo else None, float(hi) if hi else None)
+
+
 @router.get("/stocks")
-async def get_all_stocks():
-    """获取所有股票数据"""
+async def get_all_stocks(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: str = Query(DEFAULT_FIELDS, description="逗号分隔的返回字段"),
+    sort: str | None = Query(None, description="排序字段，'-' 前缀降序，如 -总市值,代码"),
+    range_: Annotated[
+        list[str] | None, Query(alias="range", description="区间过滤，可重复，如 总市值:1e10: 或 市盈率:0:30")
+    ] = None,
+    shape: str = Query("records", pattern=SHAPE_PATTERN, description="records 按行，columns 按列"),
+):
+    """分页获取股票数据，支持字段投影、排序和区间过滤"""
+    try:
+        cols = [_field(f) for f in fields.split(",") if f.strip()]
+        sort_key = _sort_spec(sort) if sort else None
+        ranges = dict(_parse_range(r) for r in range_ or [])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    snap = await current_snapshot()
+    try:
+        page, total = await blocking.run(snap.query, cols, sort_key, ranges, offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FETCH_ERRORS as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    next_offset = offset + limit if offset + limit < total else None
+    return FrameResponse(page, shape, total=total, offset=offset, limit=limit, next_offset=next_offset)
+
+
+def _select_batch(snap: MarketSnapshot, wanted: list[str]) -> tuple[pd.DataFrame, list[str]]:
+    """按代码取行，并列出快照中没有的代码"""
+    found = snap.select(wanted)
+    codes = set(found["代码"].astype(str).str.zfill(6))
+    return found, [s for s in wanted if normalize_code(s) not in codes]
+
+
+@router.get("/stocks/batch")
+async def get_stocks_batch(
+    symbols: str = Query(..., description="逗号分隔的股票代码，如 600000,sh.601398"),
+    shape: str = Query("records", pattern=SHAPE_PATTERN),
+):
+    """批量获取股票详情"""
     try:
-        df = DataService.fetch_stock_data()
-        # 只返回部分字段以减少数据传输
-        selected_cols = ['代码', '名称', '最新价', '涨跌幅', '成交额', '总市值', '市盈率']
-        result = df[selected_cols].head(100).to_dict('records')  # 限制返回数量
-        return {"data": result, "total": len(df)}
-    except Exception as e:
+        snap = await current_snapshot()
+        wanted = [s for s in symbols.split(",") if s.strip()]
+        found, missing = await blocking.run(_select_batch, snap, wanted)
+        return FrameResponse(found, shape, missing=missing)
+    except FETCH_ERRORS as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -34,14 +106,22 @@ async def get_all_stocks():
 async def get_stock_detail(symbol: str):
     """获取特定股票详情"""
     try:
-        df = DataService.fetch_stock_data()
-        stock_data = df[df['代码'] == symbol]
-        
-        if stock_data.empty:
-            raise HTTPException(status_code=404, detail=f"未找到股票代码: {symbol}")
-        
-        # 返回该股票的详细信息
-        result = stock_data.iloc[0].to_dict()
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        row = (await current_snapshot()).locate(symbol)
+    except FETCH_ERRORS as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"未找到股票代码: {symbol}")
+
+    # 返回该股票的详细信息
+    return Response(row.to_json(force_ascii=False, double_precision=DOUBLE_PRECISION), media_type="application/json")
+
+
+@router.post("/refresh")
+async def refresh_snapshot():
+    """重新拉取行情并替换内存快照"""
+    try:
+        snap = await blocking.run(snapshot_store.refresh, key="refresh")
+        return {"day": snap.day, "version": snap.version, "rows": len(snap.raw)}
+    except FETCH_ERRORS as e:
+        raise HTTPException(status_code=500, detail=str(e))
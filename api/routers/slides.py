@@ -3,6 +3,7 @@ from typing import List
 from api.models.slide_models import SlideRequest, SlideResponse, MarketSummary
 from api.services.slide_service import SlideService
 from api.services.data_service import DataService
+from api.services.executor import blocking
 
 router = APIRouter()
 slide_service = SlideService()
@@ -12,7 +13,8 @@ slide_service = SlideService()
 async def generate_slides(request: SlideRequest):
     """生成股票数据幻灯片"""
     try:
-        response = slide_service.create_stock_slides(
+        response = await blocking.run(
+            slide_service.create_stock_slides,
             stock_codes=request.stock_codes,
             filename=request.title.replace(" ", "_").lower()
         )
@@ -25,7 +27,9 @@ async def generate_slides(request: SlideRequest):
 async def generate_market_summary(filename: str = Query("market_summary", description="输出文件名")):
     """生成市场概要幻灯片"""
     try:
-        response = slide_service.create_market_summary_slides(filename=filename)
+        response = await blocking.run(
+            slide_service.create_market_summary_slides, filename=filename, key=("market-summary", filename)
+        )
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
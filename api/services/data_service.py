@@ -1,17 +1,81 @@
-from typing import List, Dict, Any, Tuple
+from typing import Dict, Any, Tuple
 import akshare as ak
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from loguru import logger
 import json
+import re
 from api.models.slide_models import StockData, MarketSummary
+from myslide.cache import CACHE
+from myslide.market import PE_COL, clean_spot
+from myslide.schema import SPOT
 import warnings
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
 TODAY = datetime.now().strftime("%Y-%m-%d")
 CACHE_DIR = Path(__file__).parent.parent.parent / 'cache'
+# 拉取、清洗行情时可预期的错误：网络（requests 异常是 OSError）、上游格式变化（SchemaError 是 ValueError）
+FETCH_ERRORS = (OSError, ValueError, KeyError)
+# StockData 字段 -> 行情列名（清洗后数据，市盈率已重命名）
+STOCK_FIELDS = {
+    "symbol": "代码",
+    "name": "名称",
+    "current_price": "最新价",
+    "change_percent": "涨跌幅",
+    "change_amount": "涨跌额",
+    "volume": "成交量",
+    "turnover": "成交额",
+    "amplitude": "振幅",
+    "high": "最高",
+    "low": "最低",
+    "open_price": "今开",
+    "prev_close": "昨收",
+    "volume_ratio": "量比",
+    "turnover_rate": "换手率",
+    "pe_ratio": "市盈率",
+    "pb_ratio": "市净率",
+    "total_market_cap": "总市值",
+    "circulating_market_cap": "流通市值",
+    "speed_up": "涨速",
+    "five_min_change": "5分钟涨跌",
+    "sixty_day_change": "60日涨跌幅",
+    "ytd_change": "年初至今涨跌幅",
+}
+# 清洗时的改名，与 dailylib.STOCK_COLUMNS 一致
+CLEAN_RENAME = {PE_COL: "市盈率"}
+CODE_RE = re.compile(r"^(?:(sh|sz|bj)\.?)?(\d{1,6})(?:\.(sh|sz|bj))?$", re.IGNORECASE)
+
+
+def exchange_of(code: str) -> str:
+    """六位代码所属交易所"""
+    if code.startswith(("92", "4", "8")):
+        return "bj"
+    if code.startswith(("6", "9")):
+        return "sh"
+    return "sz"
+
+
+def normalize_code(symbol: str) -> str | None:
+    """
+    统一为六位代码：'600000'、'sh.600000'、'SH600000'、'600000.SH'、'2415' 均可
+    带交易所前缀/后缀但与代码不符时返回 None
+    """
+    m = CODE_RE.match(str(symbol).strip())
+    if not m:
+        return None
+    prefix, digits, suffix = m.groups()
+    code = digits.zfill(6)
+    market = (prefix or suffix or "").lower()
+    if market and market != exchange_of(code):
+        return None
+    return code
+
+
+def code_index(df: pd.DataFrame) -> pd.Index:
+    """按 代码 列构建六位代码索引（哈希查找）"""
+    return pd.Index(df["代码"].astype(str).str.zfill(6), name="代码")
 
 
 class DataService:
@@ -19,23 +83,10 @@ class DataService:
     
     @staticmethod
     def fetch_stock_data(use_cache: bool = True) -> pd.DataFrame:
-        """获取A股实时数据"""
-        cache_file = CACHE_DIR / f"{TODAY}_spot_em.csv"
-        
-        if use_cache and cache_file.exists():
-            logger.info(f"从缓存加载数据: {cache_file}")
-            df = pd.read_csv(cache_file)
-            return df
-        
+        """获取A股实时数据，按 SPOT 校验并转为紧凑 dtype"""
         try:
-            df = ak.stock_zh_a_spot_em()
-            logger.info(f"成功获取股票数据: {df.shape}")
-            
-            # 创建缓存目录
-            CACHE_DIR.mkdir(parents=True, exist_ok=True)
-            df.to_csv(cache_file, index=False)
-            
-            return df
+            df = CACHE.get_or_fetch("spot_em", ak.stock_zh_a_spot_em, refresh=not use_cache)
+            return SPOT.conform(df)
         except Exception as e:
             logger.error(f"获取数据失败: {e}")
             raise
@@ -43,31 +94,16 @@ class DataService:
     @staticmethod
     def clean_stock_data(df: pd.DataFrame) -> pd.DataFrame:
         """清洗股票数据"""
-        df_clean = df.dropna(how="any").copy()
-        df_clean.iloc[:, 7] = df_clean.iloc[:, 7] / 1e8  # 成交额转为亿
-        df_clean.iloc[:, 17] = df_clean.iloc[:, 17] / 1e8  # 总市值转为亿
-        df_clean.iloc[:, 0] = 1
-        df_clean["净利润"] = df_clean.iloc[:, 17] / df_clean.iloc[:, 15]
-        df_clean["净资产"] = df_clean.iloc[:, 17] / df_clean.iloc[:, 16]
-        df_clean["净利排名"] = df_clean["净利润"].rank(ascending=False)
-        df_clean["p_tier"] = (
-            df_clean["净利润"].rank(ascending=False, pct=True) * 100
-        ).round(3)
-        df_clean["市值排名"] = df_clean.iloc[:, 17].rank(ascending=False)
-        df_clean["mv_tier"] = (
-            df_clean.iloc[:, 17].rank(ascending=False, pct=True) * 100
-        ).round(3)
-
-        df_clean = df_clean.rename(columns={"市盈率-动态": "市盈率"})
-        
+        # 与 dailylib.clean 共用同一个按列名计算的清洗函数
+        df_clean = clean_spot(df, CLEAN_RENAME)
         return df_clean
     
     @staticmethod
     def get_market_summary(df: pd.DataFrame) -> MarketSummary:
         """获取市场概要信息"""
         total_stocks = len(df)
-        total_turnover = df.iloc[:, 7].sum()  # 成交额
-        total_market_cap = df.iloc[:, 17].sum()  # 总市值
+        total_turnover = df[SPOT.turnover].sum()
+        total_market_cap = df[SPOT.total_market_cap].sum()
         
         # 计算盈亏比例
         positive_pe = len(df[df['市盈率'] > 0])
@@ -79,66 +115,11 @@ class DataService:
         }
         
         # 平均市盈率
-        avg_pe_ratio = df[df['市盈率'] > 0]['市盈率'].mean()
-        
-        # 涨跌幅排序
-        top_gainers_df = df.nlargest(5, '涨跌幅')[['代码', '名称', '最新价', '涨跌幅']].to_dict('records')
-        top_losers_df = df.nsmallest(5, '涨跌幅')[['代码', '名称', '最新价', '涨跌幅']].to_dict('records')
+        avg_pe_ratio = float(df[df['市盈率'] > 0]['市盈率'].mean())
         
-        # 转换为 StockData 对象
-        top_gainers = [
-            StockData(
-                symbol=item['代码'],
-                name=item['名称'],
-                current_price=item['最新价'],
-                change_percent=item['涨跌幅'],
-                change_amount=0,  # 这里简化处理
-                volume=0,
-                turnover=0,
-                amplitude=0,
-                high=0,
-                low=0,
-                open_price=0,
-                prev_close=0,
-                volume_ratio=0,
-                turnover_rate=0,
-                pe_ratio=0,
-                pb_ratio=0,
-                total_market_cap=0,
-                circulating_market_cap=0,
-                speed_up=0,
-                five_min_change=0,
-                sixty_day_change=0,
-                ytd_change=0
-            ) for item in top_gainers_df
-        ]
-        
-        top_losers = [
-            StockData(
-                symbol=item['代码'],
-                name=item['名称'],
-                current_price=item['最新价'],
-                change_percent=item['涨跌幅'],
-                change_amount=0,
-                volume=0,
-                turnover=0,
-                amplitude=0,
-                high=0,
-                low=0,
-                open_price=0,
-                prev_close=0,
-                volume_ratio=0,
-                turnover_rate=0,
-                pe_ratio=0,
-                pb_ratio=0,
-                total_market_cap=0,
-                circulating_market_cap=0,
-                speed_up=0,
-                five_min_change=0,
-                sixty_day_change=0,
-                ytd_change=0
-            ) for item in top_losers_df
-        ]
+        # 涨跌幅排序，直接用快照中的真实数值构建 StockData
+        top_gainers = DataService.to_stock_data(df.nlargest(5, '涨跌幅'))
+        top_losers = DataService.to_stock_data(df.nsmallest(5, '涨跌幅'))
         
         return MarketSummary(
             total_stocks=total_stocks,
@@ -151,7 +132,18 @@ class DataService:
         )
     
     @staticmethod
-    def filter_by_codes(df: pd.DataFrame, codes: List[str]) -> pd.DataFrame:
-        """根据股票代码筛选数据"""
-        filtered_df = df[df["代码"].astype(str).isin(codes)]
-        return filtered_df
\ No newline at end of file
+    def to_stock_data(df: pd.DataFrame) -> list[StockData]:
+        """按 STOCK_FIELDS 映射把行情行转换为 StockData，缺失值记为 0"""
+        cols = [c for c in STOCK_FIELDS.values() if c in df.columns]
+        sel = SPOT.widen(df[cols], CLEAN_RENAME).rename(columns={v: k for k, v in STOCK_FIELDS.items()})
+        sel = sel.fillna({k: 0 for k in sel.columns if k not in ("symbol", "name")})
+        sel["symbol"] = sel["symbol"].astype(str).str.zfill(6)
+        return [StockData(**rec) for rec in sel.to_dict("records")]
+
+    @staticmethod
+    def filter_by_codes(df: pd.DataFrame, codes: list[str], index: pd.Index | None = None) -> pd.DataFrame:
+        """根据股票代码筛选数据，index 为预先构建的 code_index(df)，按 codes 顺序返回"""
+        index = code_index(df) if index is None else index
+        wanted = [c for c in map(normalize_code, codes) if c]
+        pos = index.get_indexer(wanted)
+        return df.iloc[pos[pos >= 0]]
\ No newline at end of file
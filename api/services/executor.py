@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from api.config.settings import settings
+
+
+class BlockingExecutor:
+    """
+    在线程池中执行 pandas / akshare / Jinja / 文件写入等阻塞操作，避免卡住事件循环
+    同一 key 的并发调用合并为一次执行（single-flight），其余调用等待同一结果。
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.collapsed = 0
+
+    def _call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    async def _submit(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool, functools.partial(self._call, func, *args, **kwargs)
+        )
+
+    async def run(self, func: Callable, *args: Any, key: Hashable | None = None, **kwargs: Any) -> Any:
+        """执行阻塞函数；给出 key 时同 key 的并发请求只执行一次"""
+        if key is None:
+            return await self._submit(func, *args, **kwargs)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._submit(func, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.collapsed += 1
+        # shield: 某个等待者被取消时不影响其它等待同一结果的请求
+        return await asyncio.shield(task)
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "saturation": round(self.active / self.max_workers, 3),
+                "inflight_keys": len(self._inflight),
+                "completed": self.completed,
+                "failed": self.failed,
+                "collapsed": self.collapsed,
+            }
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+blocking = BlockingExecutor(settings.executor_workers)
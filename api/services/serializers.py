@@ -0,0 +1,40 @@
+import json
+from typing import Any
+
+import pandas as pd
+from fastapi.responses import Response
+
+SHAPES = ("records", "columns")
+# 小数位数；默认的 10 位会把 688872968.28 输出成 688872968.2799999714
+DOUBLE_PRECISION = 6
+
+
+def frame_json(df: pd.DataFrame, shape: str = "records") -> bytes:
+    """
+    DataFrame 直接编码为 JSON 字节，走 pandas 的 C 编码器，不逐行构建 dict
+    records: [{列: 值}, ...]；columns: {"列": [值, ...], ...}，列式更紧凑
+    NaN 输出为 null
+    """
+    if shape == "records":
+        return df.to_json(
+            orient="records", force_ascii=False, date_format="iso", double_precision=DOUBLE_PRECISION
+        ).encode()
+    if shape == "columns":
+        parts = [
+            f"{json.dumps(str(col), ensure_ascii=False)}:"
+            f"{df[col].to_json(orient='values', force_ascii=False, date_format='iso', double_precision=DOUBLE_PRECISION)}"
+            for col in df.columns
+        ]
+        return ("{" + ",".join(parts) + "}").encode()
+    raise ValueError(f"未知的 shape: {shape}, 可选 {SHAPES}")
+
+
+class FrameResponse(Response):
+    """内容已是 JSON 字节的响应，跳过 FastAPI 的通用编码器"""
+    media_type = "application/json"
+
+    def __init__(self, df: pd.DataFrame, shape: str = "records", **meta: Any) -> None:
+        body = b'{"data":' + frame_json(df, shape)
+        for key, value in meta.items():
+            body += b"," + json.dumps(key).encode() + b":" + json.dumps(value, ensure_ascii=False, default=str).encode()
+        super().__init__(content=body + b"}")
@@ -1,21 +1,23 @@
 from typing import List, Dict, Any
 import pandas as pd
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
 from datetime import datetime
 from loguru import logger
 from api.models.slide_models import SlideDeck, SlideResponse
-from api.services.data_service import DataService
+from api.services.snapshot import snapshot_store
+from myslide.charts import inline
+from myslide.jinja_env import get_env
+from myslide.schema import SPOT
+from myslide.slide_render import stream_to_file
 
 OUTPUT_DIR = Path(__file__).parent.parent.parent / 'reveal'
-TEMPLATE_DIR = Path(__file__).parent.parent.parent / 'src' / 'myslide' / 'templates'
 
 
 class SlideService:
     """幻灯片服务类，负责生成HTML幻灯片"""
     
     def __init__(self):
-        self.env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+        self.env = get_env()
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
     def create_deck_from_data(self, data: List[Dict[str, Any]], template: str, title: str, n_per_page: int = 10) -> SlideDeck:
@@ -36,18 +38,12 @@ class SlideService:
             deck_html_parts.append(deck_html)
         return "\n".join(deck_html_parts)
     
-    def create_slide_page(self, decks: List[SlideDeck], filename: str, chart_options: str = '{}') -> SlideResponse:
-        """创建完整的幻灯片页面"""
-        decks_html = self.render_multiple_decks(decks)
-        logger.info("所有甲板渲染完成")
-        
+    def create_slide_page(self, decks: List[SlideDeck], filename: str, chart_options: dict | str = '{}') -> SlideResponse:
+        """创建完整的幻灯片页面，逐个甲板流式写入后原子替换"""
+        sections = (self.render_deck(deck) for deck in decks)
         page_template = self.env.get_template("page.html.jinja")
-        page_html = page_template.render(sections=decks_html, chart_options=chart_options)
-        
         output_path = OUTPUT_DIR / f"{filename}.html"
-        
-        with open(output_path, "w", encoding="utf-8") as file:
-            file.write(page_html)
+        stream_to_file(output_path, page_template.generate(sections=sections, chart_options=inline(chart_options)))
         
         logger.info(f"幻灯片已保存至: {output_path}")
         
@@ -60,12 +56,8 @@ class SlideService:
     
     def create_stock_slides(self, stock_codes: List[str], filename: str = "stock_slides") -> SlideResponse:
         """创建个股幻灯片"""
-        # 获取数据
-        raw_df = DataService.fetch_stock_data()
-        clean_df = DataService.clean_stock_data(raw_df)
-        
-        # 筛选指定股票
-        filtered_df = DataService.filter_by_codes(clean_df, stock_codes)
+        # 获取数据并按代码索引筛选指定股票
+        filtered_df = snapshot_store.get().select(stock_codes, clean=True)
         stock_list = filtered_df.to_dict(orient="records")
         
         if not stock_list:
@@ -81,8 +73,7 @@ class SlideService:
     def create_market_summary_slides(self, filename: str = "market_summary") -> SlideResponse:
         """创建市场概要幻灯片"""
         # 获取数据
-        raw_df = DataService.fetch_stock_data()
-        clean_df = DataService.clean_stock_data(raw_df)
+        clean_df = snapshot_store.get().clean
         
         # 创建不同类型的甲板
         summary_deck = self._create_summary_deck(clean_df)
@@ -108,10 +99,10 @@ class SlideService:
     
     def _create_top_gainers_deck(self, df: pd.DataFrame) -> SlideDeck:
         """创建涨幅榜甲板"""
-        top_gainers = df.nlargest(10, '涨跌幅')[['名称', '涨跌幅', '代码', '最新价']].to_dict('records')
+        top_gainers = SPOT.widen(df.nlargest(10, '涨跌幅')[['名称', '涨跌幅', '代码', '最新价']]).to_dict('records')
         return self.create_deck_from_data(top_gainers, "table", "涨幅榜", n_per_page=10)
     
     def _create_top_losers_deck(self, df: pd.DataFrame) -> SlideDeck:
         """创建跌幅榜甲板"""
-        top_losers = df.nsmallest(10, '涨跌幅')[['名称', '涨跌幅', '代码', '最新价']].to_dict('records')
+        top_losers = SPOT.widen(df.nsmallest(10, '涨跌幅')[['名称', '涨跌幅', '代码', '最新价']]).to_dict('records')
         return self.create_deck_from_data(top_losers, "table", "跌幅榜", n_per_page=10)
\ No newline at end of file
@@ -0,0 +1,165 @@
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from api.services.data_service import (
+    CLEAN_RENAME,
+    DataService,
+    code_index,
+    normalize_code,
+)
+from api.services.executor import blocking
+from myslide.cache import today
+from myslide.schema import SPOT, footprint
+
+# float32 列按上游小数位比较区间，否则 30.42 存成 30.4200001 后会超出上限 30.42
+DECIMALS = {f.name: f.decimals for f in SPOT.fields if f.decimals is not None}
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """某一交易日的行情快照，加载后只读，各路由共享同一份内存"""
+    day: str
+    raw: pd.DataFrame
+    clean: pd.DataFrame
+    version: int
+    loaded_at: datetime
+    raw_index: pd.Index
+    clean_index: pd.Index
+    _orders: dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    def locate(self, symbol: str, clean: bool = False) -> pd.Series | None:
+        """按代码查单只股票，支持 600000 / sh.600000 等写法"""
+        code = normalize_code(symbol)
+        index = self.clean_index if clean else self.raw_index
+        if code is None or code not in index:
+            return None
+        df = self.clean if clean else self.raw
+        row = df.iloc[[index.get_loc(code)]]
+        return SPOT.widen(row, CLEAN_RENAME if clean else None).iloc[0]
+
+    def select(self, symbols: list[str], clean: bool = False) -> pd.DataFrame:
+        """批量查询，按 symbols 顺序返回找到的股票"""
+        df = self.clean if clean else self.raw
+        index = self.clean_index if clean else self.raw_index
+        return SPOT.widen(DataService.filter_by_codes(df, symbols, index), CLEAN_RENAME if clean else None)
+
+    def order(self, sort: str) -> np.ndarray:
+        """
+        排序后的行位置，按 sort 串缓存，同一版快照只排序一次
+        sort: 逗号分隔的列名，前缀 '-' 表示降序，如 '-总市值,代码'
+        """
+        cached = self._orders.get(sort)
+        if cached is not None:
+            return cached
+        keys = [k.strip() for k in sort.split(",") if k.strip()]
+        cols = [k.lstrip("-") for k in keys]
+        missing = [c for c in cols if c not in self.raw.columns]
+        if missing:
+            raise ValueError(f"未知排序字段: {missing}")
+        frame = self.raw[cols].set_axis(pd.RangeIndex(len(self.raw)))
+        ascending = [not k.startswith("-") for k in keys]
+        pos = frame.sort_values(cols, ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        self._orders[sort] = pos
+        return pos
+
+    def query(
+        self,
+        fields: list[str],
+        sort: str | None = None,
+        ranges: dict[str, tuple[float | None, float | None]] | None = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> tuple[pd.DataFrame, int]:
+        """按区间过滤、排序并分页，返回 (当前页, 过滤后总数)"""
+        df = self.raw
+        unknown = [c for c in [*fields, *(ranges or {})] if c not in df.columns]
+        if unknown:
+            raise ValueError(f"未知字段: {unknown}")
+
+        mask = np.ones(len(df), dtype=bool)
+        for col, (lo, hi) in (ranges or {}).items():
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64")
+            if col in DECIMALS:
+                values = values.round(DECIMALS[col])
+            # NaN 与任何数比较都是 False，缺失值自然被过滤
+            if lo is not None:
+                mask &= values >= lo
+            if hi is not None:
+                mask &= values <= hi
+
+        pos = self.order(sort) if sort else np.arange(len(df))
+        pos = pos[mask[pos]]
+        page = SPOT.widen(df.iloc[pos[offset : offset + limit]][fields])
+        return page, len(pos)
+
+
+class SnapshotStore:
+    """
+    应用生命周期内的行情快照
+    首次访问或跨日时加载并清洗一次，刷新时整体替换引用，读者拿到的始终是完整的一版。
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: MarketSnapshot | None = None
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def _load(self, refresh: bool) -> MarketSnapshot:
+        raw = DataService.fetch_stock_data(use_cache=not refresh)
+        clean = DataService.clean_stock_data(raw)
+        self._version += 1
+        snap = MarketSnapshot(
+            day=today(),
+            raw=raw,
+            clean=clean,
+            version=self._version,
+            loaded_at=datetime.now(),
+            raw_index=code_index(raw),
+            clean_index=code_index(clean),
+        )
+        logger.info(
+            f"行情快照 v{snap.version} 已加载: {snap.day} {raw.shape}，"
+            f"内存 {footprint(raw):.2f}MB + {footprint(clean):.2f}MB"
+        )
+        return snap
+
+    def peek(self) -> MarketSnapshot | None:
+        """当天快照已就绪时直接返回，否则返回 None"""
+        snap = self._snapshot
+        if snap is not None and snap.day == today():
+            return snap
+        return None
+
+    def get(self) -> MarketSnapshot:
+        snap = self.peek()
+        if snap is not None:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or snap.day != today():
+                snap = self._load(refresh=False)
+                self._snapshot = snap
+        return snap
+
+    def refresh(self) -> MarketSnapshot:
+        """重新从数据源拉取并替换当前快照"""
+        with self._lock:
+            snap = self._load(refresh=True)
+            self._snapshot = snap
+        return snap
+
+
+snapshot_store = SnapshotStore()
+
+
+async def current_snapshot() -> MarketSnapshot:
+    """热路径直接返回内存快照；冷启动时在线程池中加载，并发请求只加载一次"""
+    snap = snapshot_store.peek()
+    if snap is not None:
+        return snap
+    return await blocking.run(snapshot_store.get, key="snapshot")
@@ -7,6 +7,7 @@ import warnings
 from datetime import datetime
 
 from myslide.stock_single import StockSingleSlide, MY_CODES
+from myslide.cache import CACHE
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -19,20 +20,8 @@ TODAY = datetime.now().strftime("%Y-%m-%d")
 
 def fetch_data() -> pd.DataFrame:
     """获取股票数据，使用缓存"""
-    cache_dir = Path("cache")
-    cache_file = cache_dir / f"ashare_daily_{TODAY}.csv"
-
-    if cache_file.exists():
-        logger.info(f"Cache file exists: {cache_file}")
-        df = pd.read_csv(cache_file)
-        return df
-
     try:
-        df = ak.stock_zh_a_spot_em()
-        logger.info(f"Data fetched successfully: {df.shape}")
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        df.to_csv(cache_file, index=False)
-        return df
+        return CACHE.get_or_fetch("spot_em", ak.stock_zh_a_spot_em)
     except Exception as e:
         logger.error(f"Failed to fetch data: {e}")
         raise
@@ -1,9 +1,12 @@
 import pandas as pd
+from myslide.market import PE_COL, clean_spot
 from myslide.models import Deck
+from myslide.schema import SPOT
+from myslide.table_render import format_frame
 from pathlib import Path
 
 STOCK_COLUMNS = {
-    "市盈率": "市盈率",
+    PE_COL: "市盈率",
     "p_rank": "净利排名",
     "mv_rank": "市值排名",
 }
@@ -24,55 +27,30 @@ DISPLAY_COLS = [
     "净利排名",
     "市值排名",
 ]
-
-
-def _format_value(value: float, col: str) -> str:
-    """根据列名格式化数值"""
-    if col in ["最新价", "涨跌额", "最高", "最低"]:
-        return f"{value:.2f}"
-    elif col in ["成交额", "总市值", "净利润"]:
-        return f"{value:.2f}亿"
-    elif col in ["市盈率", "市净率"]:
-        return f"{value:.2f}"
-    elif col in ["换手率", "振幅"]:
-        return f"{value:.2f}%"
-    elif col in ["成交量"]:
-        return f"{value / 1e6:.2f}百万"
-    elif col in ["p_rank", "净利排名"]:
-        return f"{int(value)}"
-    elif col in ["mv_rank", "市值排名"]:
-        return f"{int(value)}"
-    else:
-        return f"{value:.2f}"
+# 格式化时保持原值的列
+RAW_COLS = ("名称", "涨跌幅", "代码")
+# 分布统计的列，清洗改名后的列名
+DESCRIBE_COLS = [
+    STOCK_COLUMNS.get(c, c)
+    for c in SPOT.names(
+        "change_percent", "amplitude", "turnover_rate", "pe_ratio",
+        "pb_ratio", "speed_up", "sixty_day_change", "ytd_change",
+    )
+]
 
 
 def clean(df: pd.DataFrame, rename: bool = True, format: bool = False) -> pd.DataFrame:
-    df_clean = df.dropna(how="any").copy()
-    df_clean.iloc[:, 7] = df_clean.iloc[:, 7] / 1e8
-    df_clean.iloc[:, 17] = df_clean.iloc[:, 17] / 1e8
-    df_clean.iloc[:, 0] = 1
-    df_clean["净利润"] = df_clean.iloc[:, 17] / df_clean.iloc[:, 15]
-    df_clean["净资产"] = df_clean.iloc[:, 17] / df_clean.iloc[:, 16]
-    df_clean["净利排名"] = df_clean["净利润"].rank(ascending=False)
-    df_clean["p_tier"] = (
-        df_clean["净利润"].rank(ascending=False, pct=True) * 100
-    ).round(3)
-    df_clean["市值排名"] = df_clean.iloc[:, 17].rank(ascending=False)
-    df_clean["mv_tier"] = (
-        df_clean.iloc[:, 17].rank(ascending=False, pct=True) * 100
-    ).round(3)
-
-    if rename:
-        df_clean = df_clean.rename(columns=STOCK_COLUMNS)
-
+    df_clean = clean_spot(df, STOCK_COLUMNS if rename else None)
     if format:
-        for col in df_clean.columns:
-            if col not in ["名称", "涨跌幅", "代码"]:
-                df_clean[col] = df_clean[col].apply(lambda x: _format_value(x, col))
-
+        df_clean = format_display(df_clean)
     return df_clean
 
 
+def format_display(df: pd.DataFrame) -> pd.DataFrame:
+    """展示用格式化：float32 列先还原为上游的小数位，RAW_COLS 保持原值"""
+    return format_frame(SPOT.widen(df, STOCK_COLUMNS), skip=RAW_COLS)
+
+
 def get_basic(df: pd.DataFrame) -> Deck:
     sel = df[["序号", "成交额", "总市值", "净利润"]]
     s = sel.sum()
@@ -83,7 +61,7 @@ def get_basic(df: pd.DataFrame) -> Deck:
 
 
 def get_describe(df: pd.DataFrame) -> Deck:
-    sel = df.iloc[:, [4, 8, 14, 15, 16, 19, 21, 22]]
+    sel = df[DESCRIBE_COLS]
     desc = sel.describe().round(2).iloc[1:,:]
     return Deck("tcard", desc, n_per_page=8)
 
@@ -3,6 +3,7 @@ from loguru import logger
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
+from myslide.aggregate import latest, pivot_stats, top_n_per_group
 from myslide.models import DataLoader, SlidesBuilder, Deck
 import requests
 
@@ -52,9 +53,8 @@ class Cidx399317(DataLoader):
     def clean(self, url:str):
         df = self.fetch(url)
         df.columns = ['日期', '代码', '简称', '行业', '市值', '权重']
-        table_sum = df.pivot_table(index='日期', columns='行业', values='市值', aggfunc='sum')
-        table_count = df.pivot_table(index='日期', columns='行业', values='市值', aggfunc='count')
-        return (table_sum, table_count)
+        stats = pivot_stats(df)
+        return (stats.sum, stats.count)
 
     
 class Cidx399317Builder(SlidesBuilder):
@@ -73,15 +73,14 @@ class Cidx399317Builder(SlidesBuilder):
             *all_year,
             *self.top_by_indu(df)
         ]
-        return (decks, str(self.chart_options))
+        return (decks, self.chart_options)
 
 
     def table_df(self, df:pd.DataFrame) -> tuple[pd.DataFrame, ...]:
 
         df.columns = ['日期', '代码', '简称', '行业', '市值', '权重']
-        table_sum = df.pivot_table(index='日期', columns='行业', values='市值', aggfunc='sum')
-        table_count = df.pivot_table(index='日期', columns='行业', values='市值', aggfunc='count')
-        return (table_sum, table_count)
+        stats = pivot_stats(df)
+        return (stats.sum, stats.count)
 
     def base_plot(self, x:list, y:list, type:str = 'line') -> dict:
 
@@ -118,7 +117,7 @@ class Cidx399317Builder(SlidesBuilder):
             'yAxis': {
                 'type': 'category',
                 'data': y,
-                'inverse': 'true',
+                'inverse': True,
                 'axisLabel': { 'fontSize': 36}
             },
             'series':[
@@ -150,12 +149,10 @@ class Cidx399317Builder(SlidesBuilder):
         return Deck('chart', title, title)
 
     def top_by_indu(self, df:pd.DataFrame, title_sufix:str='', topn:int = 10):
-        sel = df.loc[df['日期'] == '2025-12-31']
-        tops = sel.sort_values(['行业','市值'], ascending=[False,False]).groupby('行业').head(10).reset_index(drop=True)
-        chunks = [tops.iloc[i:i+topn] for i in range(0, len(tops), topn)]
+        tops = top_n_per_group(latest(df), '行业', '市值', topn)
         decks = []
-        for c in chunks:
-            title = f'{c['行业'].tolist()[0]}前{topn}大'
+        for indu, c in reversed(tops.items()):
+            title = f'{indu}前{topn}大'
             option = self.hbar_plot(c['市值'].tolist(), c['简称'].tolist())
             self.chart_options[title] = option
             deck = Deck('chart', title, title)
@@ -5,19 +5,17 @@ import matplotlib
 import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 from myslide.models import Deck
-from jinja2 import Environment, FileSystemLoader
+from myslide.jinja_env import get_env
 from datetime import datetime
-from myslide.models import Deck
 
 TODAY = datetime.now().strftime("%Y-%m-%d")
-TEMPLATE_DIR = Path(__file__).parent / "templates"
 
 class ImgChart:
     def __init__(self, df:pd.DataFrame, img_root:Path, output:Path)-> None:
         self.df = df
         self.img_root = img_root
         self.output = output
-        self.env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+        self.env = get_env()
         self.setup_matplotlib()
 
         
@@ -1,14 +1,14 @@
 from datetime import datetime
 from loguru import logger
 import pandas as pd
-from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 
 from myslide import dailylib
+from myslide.jinja_env import TEMPLATE_DIR, get_env
 from myslide.models import Deck
+from myslide.schema import SPOT
 
 TODAY = datetime.now().strftime("%Y-%m-%d")
-TEMPLATE_DIR = Path(__file__).parent / "templates"
 
 MY_CODES = ["300750", "600674", "600941", "600309", "2415", "688234", "601398"]
 
@@ -18,8 +18,8 @@ class StockSingleSlide:
         self.stock_codes = stock_codes
         self.df = df
         self.output = output
-        self.clean_df = dailylib.clean(self.df, rename=True, format=True)
-        self.env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+        self.clean_df = dailylib.clean(self.df, rename=True)
+        self.env = get_env()
 
     def render_deck(self, deck: Deck) -> str:
         template = self.env.get_template(f"{deck.template}.html.jinja")
@@ -43,7 +43,9 @@ class StockSingleSlide:
 
         filtered = self.clean_df[
             self.clean_df["代码"].astype(str).isin(self.stock_codes)
-        ][dailylib.DISPLAY_COLS].copy()
+        ][dailylib.DISPLAY_COLS]
+        # 只格式化选中的几只股票
+        filtered = dailylib.format_display(filtered)
 
         stock_list = filtered.to_dict(orient="records")
 
@@ -71,7 +73,7 @@ def main():
     output_dir.mkdir(parents=True, exist_ok=True)
     output_file = output_dir / "stock_single.html"
 
-    df = ak.stock_zh_a_spot_em()
+    df = SPOT.conform(ak.stock_zh_a_spot_em())
 
     processor = StockSingleSlide(MY_CODES, df, output_file)
     processor.run()
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+AGG_CACHE_SIZE = 32
+
+
+@dataclass(frozen=True)
+class PivotStats:
+    """同一张 (index × columns) 透视表的合计、计数和均值"""
+    sum: pd.DataFrame
+    count: pd.DataFrame
+    mean: pd.DataFrame
+
+
+_cache: OrderedDict[tuple, PivotStats] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _encode(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """键列编码为 (codes, 类别)，已是 category 的列直接复用；缺失值 code 为 -1"""
+    cat = s.array if isinstance(s.dtype, pd.CategoricalDtype) else pd.Categorical(s)
+    return np.asarray(cat.codes), cat.categories
+
+
+def _digest(*arrays: np.ndarray, labels: tuple[pd.Index, ...]) -> bytes:
+    """在编码后的整数数组上取指纹，比直接哈希字符串列快一个数量级"""
+    h = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        h.update(arr.dtype.str.encode())
+        h.update(np.ascontiguousarray(arr).tobytes())
+    for idx in labels:
+        h.update(pd.util.hash_pandas_object(idx, index=False).to_numpy().tobytes())
+    return h.digest()
+
+
+def pivot_stats(
+    df: pd.DataFrame,
+    index: str = "日期",
+    columns: str = "行业",
+    values: str = "市值",
+) -> PivotStats:
+    """
+    一次遍历同时算出 sum / count / mean 三张透视表，结果与 pivot_table 一致：
+    行列按类别顺序（普通列即按值排序），不存在的组合为 NaN。
+    键先编码为 categorical codes，再用 bincount 聚合；
+    按输入内容的指纹缓存，同一份数据反复透视时直接返回。
+    """
+    rows, row_labels = _encode(df[index])
+    cols, col_labels = _encode(df[columns])
+    v = pd.to_numeric(df[values], errors="coerce").to_numpy(dtype="float64")
+    key = (_digest(rows, cols, v, labels=(row_labels, col_labels)), index, columns, values)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    # 键缺失的行不参与聚合，与 pivot_table 相同
+    keep = (rows >= 0) & (cols >= 0)
+    rows, cols, v = rows[keep].astype("int64"), cols[keep].astype("int64"), v[keep]
+
+    shape = (len(row_labels), len(col_labels))
+    flat = rows * shape[1] + cols
+    size = shape[0] * shape[1]
+    valid = ~np.isnan(v)
+    present = np.bincount(flat, minlength=size).reshape(shape) > 0
+    total = np.bincount(flat[valid], weights=v[valid], minlength=size).reshape(shape).astype("float64")
+    count = np.bincount(flat[valid], minlength=size).reshape(shape).astype("float64")
+
+    total[~present] = np.nan
+    count[~present] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+
+    # 未出现的类别不保留空行空列
+    used_rows, used_cols = present.any(axis=1), present.any(axis=0)
+    row_index = pd.Index(np.asarray(row_labels)[used_rows], name=index)
+    col_index = pd.Index(np.asarray(col_labels)[used_cols], name=columns)
+
+    def frame(a: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(a[np.ix_(used_rows, used_cols)], index=row_index, columns=col_index)
+
+    stats = PivotStats(sum=frame(total), count=frame(count), mean=frame(mean))
+    with _lock:
+        _cache[key] = stats
+        while len(_cache) > AGG_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return stats
+
+
+def latest(df: pd.DataFrame, date_col: str = "日期") -> pd.DataFrame:
+    """只保留最新一期的数据"""
+    return df[df[date_col] == df[date_col].max()]
+
+
+def top_n_per_group(df: pd.DataFrame, by: str, value: str, n: int = 10) -> dict[Any, pd.DataFrame]:
+    """
+    每组取 value 最大的 n 行，按 value 降序，返回 {组: 子表}，组按类别顺序排列
+    各组内用 argpartition 做 O(k) 选择，只对选出的 n 行排序，不对整表排序；value 为空的行不参与
+    """
+    v = pd.to_numeric(df[value], errors="coerce").to_numpy(dtype="float64")
+    result = {}
+    for label, pos in df.groupby(by, sort=True, observed=True).indices.items():
+        pos = pos[~np.isnan(v[pos])]
+        if len(pos) > n:
+            pos = pos[np.argpartition(-v[pos], n - 1)[:n]]
+        pos = pos[np.argsort(-v[pos], kind="stable")]
+        result[label] = df.iloc[pos]
+    return result
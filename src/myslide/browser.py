@@ -0,0 +1,123 @@
+import atexit
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from loguru import logger
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib3.exceptions import HTTPError
+
+from myslide.fetching import USER_AGENT
+
+BROWSER_LIMIT = 2  # 同时存在的 Chrome 进程上限
+ACQUIRE_TIMEOUT = 120.0
+READY_TIMEOUT = 10.0
+# chromedriver 进程已退出时，请求会在 urllib3 或 socket 层失败，而不是 WebDriverException
+DRIVER_ERRORS = (WebDriverException, HTTPError, OSError)
+
+
+def chrome_options(headless: bool = True) -> Options:
+    options = Options()
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+    return options
+
+
+def wait_for_js(driver: WebDriver, script: str, timeout: float = READY_TIMEOUT, poll: float = 0.2) -> Any:
+    """轮询执行脚本直到返回真值，替代固定的 sleep；超时抛出 TimeoutException"""
+    return WebDriverWait(driver, timeout, poll_frequency=poll).until(lambda d: d.execute_script(script))
+
+
+class BrowserPool:
+    """
+    复用的无头浏览器会话池
+    session() 借出一个已启动的 Chrome，用完归还；最多同时存在 size 个进程，
+    出错的会话直接销毁，进程退出时统一 quit，不留下孤儿 Chrome。
+    """
+
+    def __init__(self, size: int = BROWSER_LIMIT, headless: bool = True) -> None:
+        self.size = size
+        self.headless = headless
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: list[WebDriver] = []
+        self._all: set[WebDriver] = set()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _create(self) -> WebDriver:
+        driver = webdriver.Chrome(options=chrome_options(self.headless))
+        with self._lock:
+            self._all.add(driver)
+        logger.debug(f"Chrome 已启动 ({len(self._all)}/{self.size})")
+        return driver
+
+    def _discard(self, driver: WebDriver) -> None:
+        with self._lock:
+            self._all.discard(driver)
+        try:
+            driver.quit()
+        except DRIVER_ERRORS as e:
+            logger.warning(f"关闭 Chrome 出错: {e}")
+
+    def _alive(self, driver: WebDriver) -> bool:
+        try:
+            _ = driver.current_url
+        except DRIVER_ERRORS:
+            return False
+        return True
+
+    def _take(self) -> WebDriver:
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                return self._create()
+            if self._alive(driver):
+                return driver
+            self._discard(driver)
+
+    @contextmanager
+    def session(self, timeout: float = ACQUIRE_TIMEOUT) -> Iterator[WebDriver]:
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"{timeout}s 内没有空闲的浏览器会话")
+        try:
+            driver = self._take()
+            try:
+                yield driver
+            except BaseException:
+                # 页面状态未知，不再复用
+                self._discard(driver)
+                raise
+            else:
+                with self._lock:
+                    if driver in self._all:
+                        self._idle.append(driver)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """关闭全部会话，包括仍被借出的"""
+        with self._lock:
+            drivers = list(self._all)
+            self._all.clear()
+            self._idle.clear()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except DRIVER_ERRORS as e:
+                logger.warning(f"关闭 Chrome 出错: {e}")
+        if drivers:
+            logger.info(f"已关闭 {len(drivers)} 个 Chrome")
+
+
+BROWSERS = BrowserPool()
@@ -0,0 +1,445 @@
+import atexit
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+from typer import Typer
+
+from myslide.fileio import atomic_path, atomic_write
+
+CACHE_DIR = Path(__file__).parent.parent.parent / "cache"
+SUFFIX = ".parquet"
+STATS_FILE = "_stats.json"
+# 写入时间存进 parquet 元数据；文件 mtime 表示最近使用时间（LRU），不能当作抓取时间
+FETCHED_AT_KEY = b"myslide.fetched_at"
+DATE_RE = re.compile(r"(\d{4})-(\d{2})(?:-(\d{2}))?")
+
+app = Typer()
+
+
+def today() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+class CacheStats:
+    """按数据集统计命中/未命中次数，进程退出时累加写入 cache/_stats.json"""
+
+    def __init__(self, root: Path) -> None:
+        self.file = root / STATS_FILE
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, dataset: str, hit: bool) -> None:
+        with self.lock:
+            (self.hits if hit else self.misses)[dataset] += 1
+
+    def load(self) -> dict[str, dict[str, int]]:
+        if not self.file.exists():
+            return {}
+        try:
+            return json.loads(self.file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self.hits and not self.misses:
+                return
+            data = self.load()
+            for dataset in set(self.hits) | set(self.misses):
+                row = data.setdefault(dataset, {"hits": 0, "misses": 0})
+                row["hits"] += self.hits[dataset]
+                row["misses"] += self.misses[dataset]
+            self.hits.clear()
+            self.misses.clear()
+        atomic_write(self.file, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+class FrameCache:
+    """
+    DataFrame 列式缓存，Parquet(zstd) 存储，读时可按列投影并使用内存映射
+    键规则：cache/{dataset}/{key}.parquet 或 cache/{dataset}/{key}/{part}.parquet
+    key 默认是当天日期，按月的数据用 YYYY-MM，参考数据可用任意名称。
+    """
+
+    def __init__(self, root: Path = CACHE_DIR) -> None:
+        self.root = root
+        self.stats = CacheStats(root)
+        atexit.register(self.stats.flush)
+
+    def path(self, dataset: str, key: str | None = None, part: str | None = None) -> Path:
+        key = key or today()
+        if part is None:
+            return self.root / dataset / f"{key}{SUFFIX}"
+        return self.root / dataset / key / f"{part}{SUFFIX}"
+
+    def exists(self, dataset: str, key: str | None = None, part: str | None = None) -> bool:
+        return self.path(dataset, key, part).exists()
+
+    def fetched_at(self, dataset: str, key: str | None = None, part: str | None = None) -> float | None:
+        """数据写入缓存的时间戳，只读 parquet 元数据，不影响 LRU；文件不存在或没有记录时返回 None"""
+        path = self.path(dataset, key, part)
+        if not path.exists():
+            return None
+        metadata = pq.read_schema(path).metadata or {}
+        try:
+            return float(metadata[FETCHED_AT_KEY])
+        except (KeyError, ValueError):
+            return None
+
+    def read(
+        self,
+        dataset: str,
+        key: str | None = None,
+        part: str | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame | None:
+        """读取缓存，不存在时返回 None"""
+        path = self.path(dataset, key, part)
+        if not path.exists():
+            self.stats.record(dataset, hit=False)
+            return None
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        self.stats.record(dataset, hit=True)
+        os.utime(path)  # 记录最近使用时间，供 LRU 淘汰
+        logger.debug(f"cache hit: {path.relative_to(self.root)}")
+        return table.to_pandas()
+
+    def write(
+        self,
+        df: pd.DataFrame,
+        dataset: str,
+        key: str | None = None,
+        part: str | None = None,
+    ) -> Path:
+        """原子写入：先写临时文件再改名，读者不会看到写了一半的文件"""
+        path = self.path(dataset, key, part)
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # 上游偶尔在数值列里混入 "—" 之类的占位符，整列按字符串保存
+            mixed = df.select_dtypes(include="object").columns
+            table = pa.Table.from_pandas(
+                df.astype({c: "string" for c in mixed}), preserve_index=False
+            )
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), FETCHED_AT_KEY: str(time.time()).encode()}
+        )
+        with atomic_path(path) as tmp:
+            pq.write_table(table, tmp, compression="zstd")
+        return path
+
+    def get_or_fetch(
+        self,
+        dataset: str,
+        fetch: Callable[[], pd.DataFrame],
+        key: str | None = None,
+        part: str | None = None,
+        columns: list[str] | None = None,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
+        """命中缓存直接读取，否则调用 fetch 获取并写入缓存"""
+        if not refresh:
+            df = self.read(dataset, key, part, columns)
+            if df is not None:
+                return df
+        df = fetch()
+        path = self.write(df, dataset, key, part)
+        logger.info(f"{path.relative_to(self.root)} saved: {df.shape}")
+        return df[columns] if columns else df
+
+
+@dataclass
+class Retention:
+    """
+    数据集保留规则
+    keep_days: 保留最近 N 天，None 表示不按天数清理
+    keep_month_end: 额外保留每个月最后一份快照
+    pinned: 不参与容量淘汰（无法重新下载的历史数据）
+    """
+    keep_days: int | None = 30
+    keep_month_end: bool = True
+    pinned: bool = False
+
+
+RETENTION: dict[str, Retention] = {
+    "spot_em": Retention(keep_days=10),
+    "news_em": Retention(keep_days=7, keep_month_end=False),
+    "sw_com": Retention(keep_days=2, keep_month_end=False),
+    "sw_daily": Retention(keep_days=10),
+    "sw_clean": Retention(keep_days=10),
+    "399317": Retention(keep_days=None),
+    "sw_ref": Retention(keep_days=None),
+    "399317_hist": Retention(keep_days=None, pinned=True),
+}
+DEFAULT_RETENTION = Retention()
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    """一个缓存键：单个文件，或按 part 拆分的目录"""
+    dataset: str
+    key: str
+    path: Path
+    day: date | None
+    size: int
+    used: float
+
+
+def _key_date(key: str) -> date | None:
+    m = DATE_RE.search(key)
+    if not m:
+        return None
+    y, mth, d = m.groups()
+    try:
+        return date(int(y), int(mth), int(d or 1))
+    except ValueError:
+        return None
+
+
+def _entry(dataset: str, path: Path) -> CacheEntry:
+    files = [f for f in path.rglob("*") if f.is_file()] if path.is_dir() else [path]
+    stats = [f.stat() for f in files]
+    key = path.name.removesuffix(SUFFIX)
+    return CacheEntry(
+        dataset=dataset,
+        key=key,
+        path=path,
+        day=_key_date(key),
+        size=sum(st.st_size for st in stats),
+        used=max((st.st_mtime for st in stats), default=0.0),
+    )
+
+
+class CacheManager:
+    """按数据集保留规则和总容量上限清理缓存目录，超出容量时按 LRU 淘汰"""
+
+    def __init__(
+        self,
+        root: Path = CACHE_DIR,
+        rules: dict[str, Retention] | None = None,
+        max_bytes: int | None = MAX_CACHE_BYTES,
+    ) -> None:
+        self.root = root
+        self.rules = RETENTION if rules is None else rules
+        self.max_bytes = max_bytes
+
+    def entries(self) -> list[CacheEntry]:
+        result = []
+        if not self.root.exists():
+            return result
+        for ds_dir in sorted(self.root.iterdir()):
+            if not ds_dir.is_dir() or ds_dir.name.startswith(("_", ".")):
+                continue
+            for path in ds_dir.iterdir():
+                if path.name.startswith("."):
+                    continue
+                if path.is_dir() or path.suffix == SUFFIX:
+                    result.append(_entry(ds_dir.name, path))
+        return result
+
+    def legacy(self) -> list[Path]:
+        """旧版按日期命名的 csv 缓存（cache/*.csv、cache/sw/*.csv）"""
+        files = list(self.root.glob("*.csv")) + list((self.root / "sw").glob("*.csv"))
+        return [f for f in files if _key_date(f.stem)]
+
+    def expired(self, entries: list[CacheEntry], now: date | None = None) -> list[CacheEntry]:
+        now = now or date.today()
+        by_dataset: dict[str, list[CacheEntry]] = {}
+        for e in entries:
+            by_dataset.setdefault(e.dataset, []).append(e)
+
+        result = []
+        for dataset, items in by_dataset.items():
+            rule = self.rules.get(dataset, DEFAULT_RETENTION)
+            if rule.keep_days is None:
+                continue
+            month_end: dict[tuple[int, int], CacheEntry] = {}
+            if rule.keep_month_end:
+                for e in items:
+                    if e.day is None:
+                        continue
+                    ym = (e.day.year, e.day.month)
+                    if ym not in month_end or e.day > month_end[ym].day:  # type: ignore[operator]
+                        month_end[ym] = e
+            kept = {id(e) for e in month_end.values()}
+            for e in items:
+                if e.day is None or id(e) in kept:
+                    continue
+                if (now - e.day).days >= rule.keep_days:
+                    result.append(e)
+        return result
+
+    def prune(self, dry_run: bool = False, legacy: bool = False) -> list[Path]:
+        """先按保留规则删除过期项，再按 LRU 把总量压到 max_bytes 以下"""
+        entries = self.entries()
+        doomed = self.expired(entries)
+        doomed_ids = {id(e) for e in doomed}
+        alive = [e for e in entries if id(e) not in doomed_ids]
+
+        if self.max_bytes is not None:
+            total = sum(e.size for e in alive)
+            for e in sorted(alive, key=lambda e: e.used):
+                if total <= self.max_bytes:
+                    break
+                if self.rules.get(e.dataset, DEFAULT_RETENTION).pinned:
+                    continue
+                doomed.append(e)
+                total -= e.size
+
+        removed = [e.path for e in doomed]
+        freed = sum(e.size for e in doomed)
+        if legacy:
+            old = self.legacy()
+            removed += old
+            freed += sum(f.stat().st_size for f in old)
+        for path in removed:
+            if dry_run:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+        logger.info(f"cache prune: {len(removed)} 项, 释放 {freed / 1e6:.1f} MB{' (dry run)' if dry_run else ''}")
+        return removed
+
+    def stats(self) -> pd.DataFrame:
+        """各数据集的条目数、磁盘占用、最新/最旧条目天数和命中率"""
+        hits = CacheStats(self.root).load()
+        now = time.time()
+        rows = {}
+        for e in self.entries():
+            row = rows.setdefault(e.dataset, {"entries": 0, "bytes": 0, "newest": None, "oldest": None})
+            row["entries"] += 1
+            row["bytes"] += e.size
+            age = (now - e.used) / 86400 if e.day is None else (date.today() - e.day).days
+            row["newest"] = age if row["newest"] is None else min(row["newest"], age)
+            row["oldest"] = age if row["oldest"] is None else max(row["oldest"], age)
+        legacy = self.legacy()
+        if legacy:
+            rows["(legacy csv)"] = {
+                "entries": len(legacy),
+                "bytes": sum(f.stat().st_size for f in legacy),
+                "newest": None,
+                "oldest": None,
+            }
+        df = pd.DataFrame.from_dict(rows, orient="index")
+        if df.empty:
+            return df
+        h = pd.DataFrame.from_dict(hits, orient="index").reindex(df.index).fillna(0)
+        if h.empty:
+            h = pd.DataFrame({"hits": 0, "misses": 0}, index=df.index)
+        lookups = h["hits"] + h["misses"]
+        df["hit_rate"] = (h["hits"] / lookups.where(lookups > 0)).round(3)
+        df.index.name = "dataset"
+        return df
+
+
+class HistoryStore:
+    """
+    追加式历史表，按日期所在月份分区：cache/{dataset}/{YYYY-MM}.parquet
+    以 keys 为主键去重，写入只涉及新数据所在的月份，重复写入同一批数据不产生变化；
+    读取时先按日期范围裁剪分区，再把日期、其它列的过滤条件下推到 Parquet。
+    日期列为 YYYY-MM-DD 字符串。
+    """
+
+    def __init__(self, dataset: str, keys: tuple[str, ...], date_col: str = "日期") -> None:
+        self.dataset = dataset
+        self.keys = list(keys)
+        self.date_col = date_col
+
+    @property
+    def root(self) -> Path:
+        return CACHE.root / self.dataset
+
+    def months(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.stem for p in self.root.glob(f"*{SUFFIX}") if not p.name.startswith("."))
+
+    def ingest(self, df: pd.DataFrame) -> list[str]:
+        """写入新数据，返回实际改动的月份"""
+        changed = []
+        for month, part in df.groupby(df[self.date_col].str[:7], sort=True):
+            old = CACHE.read(self.dataset, key=month)
+            merged = part if old is None else pd.concat([old, part], ignore_index=True)
+            merged = (
+                merged.drop_duplicates(self.keys, keep="last")
+                .sort_values(self.keys, kind="stable")
+                .reset_index(drop=True)
+            )
+            if old is not None and merged.equals(old):
+                continue
+            CACHE.write(merged, self.dataset, key=month)
+            changed.append(month)
+        if changed:
+            logger.info(f"{self.dataset} 写入分区: {changed}")
+        return changed
+
+    def read(
+        self,
+        columns: list[str] | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        where: dict[str, list] | None = None,
+    ) -> pd.DataFrame:
+        """
+        按条件读取
+        start/end: 日期闭区间 YYYY-MM-DD（或 YYYY-MM），只打开范围内的月份分区
+        where: {列: 取值列表}，如 {"行业": ["能源", "金融"]}
+        """
+        months = [
+            m for m in self.months()
+            if (start is None or m >= start[:7]) and (end is None or m <= end[:7])
+        ]
+        filters = []
+        if start is not None and len(start) > 7:
+            filters.append((self.date_col, ">=", start))
+        if end is not None and len(end) > 7:
+            filters.append((self.date_col, "<=", end))
+        for col, values in (where or {}).items():
+            filters.append((col, "in", list(values)))
+        tables = [
+            pq.read_table(CACHE.path(self.dataset, m), columns=columns, filters=filters or None, memory_map=True)
+            for m in months
+        ]
+        CACHE.stats.record(self.dataset, hit=bool(tables))
+        if not tables:
+            return pd.DataFrame(columns=columns or self.keys)
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+
+CACHE = FrameCache()
+
+
+@app.command("stats")
+def stats_cmd():
+    """查看缓存统计：条目数、磁盘占用、天数、命中率"""
+    df = CacheManager().stats()
+    if df.empty:
+        print("cache is empty")
+        return
+    df["MB"] = (df.pop("bytes") / 1e6).round(2)
+    print(df.to_string())
+    print(f"total: {df['MB'].sum():.2f} MB")
+
+
+@app.command("prune")
+def prune_cmd(dry_run: bool = False, legacy: bool = False, max_mb: int = MAX_CACHE_BYTES >> 20):
+    """按保留规则清理缓存，--legacy 同时删除旧版 csv 缓存"""
+    for path in CacheManager(max_bytes=max_mb << 20).prune(dry_run=dry_run, legacy=legacy):
+        print(path)
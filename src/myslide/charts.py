@@ -0,0 +1,163 @@
+import ast
+import hashlib
+import json
+import math
+import os
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from myslide.fileio import atomic_write
+
+CHARTS_SUFFIX = ".charts.json"
+CHART_DIR_SUFFIX = ".charts"
+SHARED_MIN_LEN = 8  # 短于此长度的数组不值得抽成引用
+# 已打开的轮播页仍引用旧哈希，旧清单和图表文件超过此时长未再被写入才删除
+CHART_TTL = 3 * 24 * 3600
+
+
+def jsonable(obj: Any) -> Any:
+    """把图表配置转换为可 JSON 编码的结构：numpy/pandas 标量转原生类型，NaN/inf 转 null"""
+    if isinstance(obj, dict):
+        return {str(k): jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [jsonable(v) for v in obj]
+    if isinstance(obj, (np.ndarray, pd.Series, pd.Index)):
+        return jsonable(obj.tolist())
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, (datetime, date, pd.Timestamp)):
+        return obj.isoformat()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    return obj
+
+
+def dumps(obj: Any) -> str:
+    """紧凑 JSON，中文不转义"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def parse_options(options: dict | str) -> dict:
+    """兼容旧接口：字符串既可能是 JSON，也可能是 str(dict) 的 Python repr"""
+    if isinstance(options, dict):
+        return options
+    try:
+        return json.loads(options)
+    except ValueError:
+        return ast.literal_eval(options)
+
+
+def pack(options: dict | str) -> dict:
+    """
+    生成图表数据包 {"refs": {...}, "charts": {图表id: option}}
+    多个图表共用的 data 数组（如相同的日期横轴）只保留一份，
+    原位置替换为 {"$ref": 键}，由页面运行时还原
+    """
+    charts = jsonable(parse_options(options))
+    seen: dict[str, int] = {}
+
+    def walk(node: Any, visit) -> Any:
+        if isinstance(node, dict):
+            return {
+                k: visit(v) if k == "data" and isinstance(v, list) and len(v) >= SHARED_MIN_LEN else walk(v, visit)
+                for k, v in node.items()
+            }
+        if isinstance(node, list):
+            return [walk(v, visit) for v in node]
+        return node
+
+    def count(arr: list) -> list:
+        key = dumps(arr)
+        seen[key] = seen.get(key, 0) + 1
+        return arr
+
+    walk(charts, count)
+    shared = {key: f"r{i}" for i, key in enumerate(k for k, n in seen.items() if n > 1)}
+    if not shared:
+        return {"refs": {}, "charts": charts}
+
+    def replace(arr: list) -> Any:
+        ref = shared.get(dumps(arr))
+        return {"$ref": ref} if ref else arr
+
+    return {
+        "refs": {ref: json.loads(key) for key, ref in shared.items()},
+        "charts": walk(charts, replace),
+    }
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def write_hashed(path: Path, text: str) -> None:
+    """文件名里已带内容哈希，存在即内容相同，不重复写，只刷新修改时间表示仍在使用"""
+    if path.exists():
+        os.utime(path)
+        return
+    atomic_write(path, text)
+
+
+def prune_stale(paths: list[Path], keep: set[str], ttl: float = CHART_TTL) -> int:
+    """删除不在 keep 中且超过 ttl 未被写入的文件；刚被替换的旧版本留给仍打开的页面继续加载"""
+    now = time.time()
+    removed = 0
+    for old in paths:
+        if old.name in keep:
+            continue
+        try:
+            if now - old.stat().st_mtime > ttl:
+                old.unlink(missing_ok=True)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def write_manifest(data: dict, out_dir: Path, fn: str) -> str:
+    """写入 {fn}.{内容哈希}.charts.json，同名页面的旧版本过期后才删除，返回文件名"""
+    text = dumps(data)
+    name = f"{fn}.{content_hash(text)}{CHARTS_SUFFIX}"
+    write_hashed(out_dir / name, text)
+    olds = [p for p in out_dir.glob(f"{fn}.*{CHARTS_SUFFIX}") if p.name.count(".") == name.count(".")]
+    prune_stale(olds, {name})
+    return name
+
+
+def write_charts(options: dict | str, out_dir: Path, fn: str) -> str:
+    """
+    全部图表数据写入一个 {fn}.{内容哈希}.charts.json，返回文件名
+    数据不变时文件名不变，浏览器可长期缓存
+    """
+    return write_manifest(pack(options), out_dir, fn)
+
+
+def write_chart_files(options: dict | str, out_dir: Path, fn: str) -> str:
+    """
+    每个图表单独写入 {fn}.charts/{内容哈希}.json，另写一个清单 {fn}.{哈希}.charts.json，
+    清单中 charts 为 {图表id: 相对路径}，共享数组 refs 仍放在清单里。
+    页面只在图表页临近时才请求对应文件；不再引用的图表文件过期后才删除，已打开的页面仍能加载旧文件。
+    """
+    packed = pack(options)
+    chart_dir = out_dir / f"{fn}{CHART_DIR_SUFFIX}"
+    charts = {}
+    for chart_id, option in packed["charts"].items():
+        text = dumps(option)
+        name = f"{content_hash(text)}.json"
+        write_hashed(chart_dir / name, text)
+        charts[chart_id] = f"{chart_dir.name}/{name}"
+    keep = {Path(p).name for p in charts.values()}
+    prune_stale(list(chart_dir.glob("*.json")), keep)
+    return write_manifest({"refs": packed["refs"], "charts": charts}, out_dir, fn)
+
+
+def inline(options: dict | str) -> str:
+    """直接写进 <script> 的数据包，转义 </ 以免字符串提前闭合脚本标签"""
+    return dumps(pack(options)).replace("</", "<\\/")
@@ -6,6 +6,8 @@ import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from myslide.models import DataLoader, SlidesBuilder, Deck
+from myslide.aggregate import latest, pivot_stats, top_n_per_group
+from myslide.cache import CACHE, HistoryStore
 import requests
 
 # 该数据源2025-12-31给出了近五年来每个月的行业和市值，但到2026-01-31就只给出单月的了。
@@ -15,6 +17,11 @@ DATA_URL = {
     'cidx399317' : f"https://www.cnindex.com.cn/sample-detail/download-history?indexcode=399317"}
 
 url = f"https://www.cnindex.com.cn/sample-detail/download-history?indexcode=399317"
+COLUMNS = ['日期', '代码', '简称', '行业', '市值', '权重']
+# 月度趋势图只用到这几列
+TREND_COLUMNS = ['日期', '行业', '市值']
+LEGACY_CSV = CACHE_DIR / '399317_all.csv'
+HISTORY = HistoryStore('399317_hist', keys=('日期', '代码'))
 
 headers = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36",
@@ -30,37 +37,45 @@ headers = {
 class Cidx399317Loader(DataLoader):
 
     def fetch(self, url:str) -> pd.DataFrame:
-        cache_file = CACHE_DIR / f'{TODAY[:8]}399317.csv'
-        # 发起 GET 请求
-
-        if cache_file.exists():
-            logger.info(f"Cache file exists: {cache_file}")
-            df = pd.read_csv(cache_file)
-            return df
+        # 按月发布，缓存键用 YYYY-MM
         try:
-            response = requests.get(DATA_URL[url], headers=headers)
-            response.raise_for_status()  # 如果状态码不是 2xx，抛出异常
-            excel_data = io.BytesIO(response.content)
-            df = pd.read_excel(excel_data, engine='openpyxl')
-            logger.info(f"spot_em data fetched successfully: {df.shape}")
-            CACHE_DIR.mkdir(parents=True, exist_ok=True)
-            df.to_csv(cache_file, index=False)
-            logger.info(f"文件已成功下载并保存为：{cache_file}")
-            return df
+            return CACHE.get_or_fetch('399317', lambda: self.download(url), key=TODAY[:7])
         except Exception as e:
             logger.error(f"Failed to fetch data: {e}")
             raise
 
-    def all_years(self, df:pd.DataFrame) -> pd.DataFrame:
-        history = pd.read_csv(CACHE_DIR/'399317_all.csv')
-        all_years = pd.concat([df, history])
-        all_years = all_years.drop_duplicates()
-        return all_years
+    def download(self, url:str) -> pd.DataFrame:
+        # 发起 GET 请求
+        response = requests.get(DATA_URL[url], headers=headers)
+        response.raise_for_status()  # 如果状态码不是 2xx，抛出异常
+        excel_data = io.BytesIO(response.content)
+        df = pd.read_excel(excel_data, engine='openpyxl')
+        logger.info(f"399317 data fetched successfully: {df.shape}")
+        return df
+
+    def normalize(self, df:pd.DataFrame) -> pd.DataFrame:
+        """统一列名和类型：日期 YYYY-MM-DD，代码补足 6 位"""
+        df = df.set_axis(COLUMNS, axis=1)
+        return df.assign(
+            日期=pd.to_datetime(df['日期']).dt.strftime('%Y-%m-%d'),
+            代码=df['代码'].astype(str).str.zfill(6),
+            简称=df['简称'].astype(str),
+            行业=df['行业'].astype(str),
+            市值=pd.to_numeric(df['市值'], errors='coerce').astype('float64'),
+            权重=pd.to_numeric(df['权重'], errors='coerce').astype('float64'),
+        )
+
+    def all_years(self, df:pd.DataFrame, columns:list[str] | None = TREND_COLUMNS) -> pd.DataFrame:
+        """当月数据并入按月分区的历史表，只改动当月分区，再按需读取列"""
+        if not HISTORY.months() and LEGACY_CSV.exists():
+            # 一次性迁移旧的全量 csv
+            HISTORY.ingest(self.normalize(pd.read_csv(LEGACY_CSV)))
+        HISTORY.ingest(df)
+        return HISTORY.read(columns=columns)
     
     def clean(self, url:str):
-        month_df = self.fetch(url)
+        month_df = self.normalize(self.fetch(url))
         all_data = self.all_years(month_df)
-        all_data.to_csv(CACHE_DIR/'399317_all.csv', index=False)
         return [month_df, all_data]
 
 # build slide decks    
@@ -71,22 +86,20 @@ class Cidx399317Builder(SlidesBuilder):
 
     def builder(self, dfs: list[pd.DataFrame]) -> tuple:
         df, all_data = dfs
-        df.columns = ['日期', '代码', '简称', '行业', '市值', '权重']
-        all_data.columns = ['日期', '代码', '简称', '行业', '市值', '权重']
         all_month = self.all_month(all_data)
-        sum_table, count_table = self.table_df(df)
+        stats = pivot_stats(df)
         decks = [
             Deck('cover', TODAY[:7],'国证全指399317'),
             *all_month,
             self.list_count(df),
-            self.last_month_rank(sum_table, '行业规模'),
-            self.last_month_rank(sum_table/count_table, '平均规模'),
+            self.last_month_rank(stats.sum, '行业规模'),
+            self.last_month_rank(stats.mean, '平均规模'),
             *self.top_by_indu(df)
         ]
-        return (decks, str(self.chart_options))
+        return (decks, self.chart_options)
 
     def all_month(self, df: pd.DataFrame):
-        table_sum, _ = self.table_df(df)
+        table_sum = pivot_stats(df).sum
         cols = table_sum.columns
         decks = []
         for col in cols:
@@ -97,11 +110,9 @@ class Cidx399317Builder(SlidesBuilder):
         
 
     def table_df(self, df:pd.DataFrame) -> tuple[pd.DataFrame, ...]:
-
-        # df.columns = ['日期', '代码', '简称', '行业', '市值', '权重']
-        table_sum = df.pivot_table(index='日期', columns='行业', values='市值', aggfunc='sum')
-        table_count = df.pivot_table(index='日期', columns='行业', values='市值', aggfunc='count')
-        return (table_sum, table_count)
+        # (日期 × 行业) 的市值合计和个数，一次聚合得到
+        stats = pivot_stats(df)
+        return (stats.sum, stats.count)
 
     def base_plot(self, x:list, y:list, type:str = 'line') -> dict:
 
@@ -138,7 +149,7 @@ class Cidx399317Builder(SlidesBuilder):
             'yAxis': {
                 'type': 'category',
                 'data': y,
-                'inverse': 'true',
+                'inverse': True,
                 'axisLabel': { 'fontSize': 36}
             },
             'series':[
@@ -171,11 +182,11 @@ class Cidx399317Builder(SlidesBuilder):
         return Deck('chart', title, title)
 
     def top_by_indu(self, df:pd.DataFrame, title_sufix:str='', topn:int = 10):
-        tops = df.sort_values(['行业','市值'], ascending=[False,False]).groupby('行业').head(topn).reset_index(drop=True)
-        chunks = [tops.iloc[i:i+topn] for i in range(0, len(tops), topn)]
+        # 每个行业一张图，取最新一期
+        tops = top_n_per_group(latest(df), '行业', '市值', topn)
         decks = []
-        for c in chunks:
-            title = f'{c['行业'].tolist()[0]}前{topn}大'
+        for indu, c in reversed(tops.items()):
+            title = f'{indu}前{topn}大'
             option = self.hbar_plot(c['市值'].tolist(), c['简称'].tolist())
             self.chart_options[title] = option
             deck = Deck('chart', title, title)
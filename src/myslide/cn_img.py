@@ -5,16 +5,21 @@
 """
 from typer import Typer
 from loguru import logger
-from typing_extensions import Any
+from typing import Any
+from collections.abc import Iterable, Iterator
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from requests import RequestException
 import pandas as pd
 import json
-import time
-from selenium import webdriver
+import re
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+from myslide.browser import BROWSERS, BrowserPool, wait_for_js
+from myslide.fetching import http_session
+from myslide.media import MediaMirror
 from myslide.models import DataLoader, SlidesBuilder, Deck
 
 app = Typer()
@@ -22,26 +27,202 @@ app = Typer()
 data_sources = {
     'cn_img':"https://channel.chinanews.com.cn/u/pic/news.shtml"
 }
-user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# docArr 已填充，或列表已渲染出条目，即可开始提取
+READY_SCRIPT = (
+    "return (typeof docArr !== 'undefined' && docArr && docArr.length > 0)"
+    " || document.querySelectorAll('#ent0 li').length > 0;"
+)
+# auto: 先走 HTTP，解析失败再用浏览器；http / browser: 只走其中一条
+LOAD_MODES = ("auto", "http", "browser")
+HTTP_TIMEOUT = 10.0
+MAX_DATA_SCRIPTS = 5
+
+DOC_ARR_RE = re.compile(r"docArr\s*=\s*(\[.*?\])\s*;", re.DOTALL)
+SCRIPT_SRC_RE = re.compile(r"<script[^>]+src=[\"']([^\"']+\.js[^\"']*)[\"']", re.IGNORECASE)
+JS_KEY_RE = re.compile(r"([{,]\s*)([A-Za-z_$][\w$]*)\s*:")
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+NEWS_SCHEMA = {"index": "int32", "img_src": "string", "news_title": "string"}
+# 进程内复用的 HTTP 会话，多次抓取共用连接池
+SESSION = http_session(pool_size=2)
+
+
+def news_frame(records: Iterable[dict]) -> pd.DataFrame:
+    """一次性由记录构建带类型的 DataFrame，空输入也保留列和类型"""
+    return pd.DataFrame.from_records(list(records), columns=list(NEWS_SCHEMA)).astype(NEWS_SCHEMA)
+
+
+def doc_items(docs: Iterable[Any]) -> list[dict]:
+    """docArr 条目转为 {img_src, news_title}，只保留同时有图片和标题的"""
+    items = [
+        {"img_src": str(d.get("img") or ""), "news_title": str(d.get("title") or "").strip()}
+        for d in docs
+        if isinstance(d, dict)
+    ]
+    return [i for i in items if i["img_src"] and i["news_title"]]
+
+
+def parse_doc_arr(text: str) -> list[dict] | None:
+    """
+    从页面或脚本源码中解析 docArr 数组，返回 [{img_src, news_title}, ...]
+    兼容 JSON 和常见的 JS 对象字面量（未加引号的键、单引号、尾逗号），解析不了返回 None
+    """
+    m = DOC_ARR_RE.search(text)
+    if m is None:
+        return None
+    raw = m.group(1)
+    try:
+        docs = json.loads(raw)
+    except ValueError:
+        literal = JS_KEY_RE.sub(r'\1"\2":', raw)
+        literal = re.sub(r"'((?:[^'\\]|\\.)*)'", lambda s: json.dumps(s.group(1)), literal)
+        literal = TRAILING_COMMA_RE.sub(r"\1", literal)
+        try:
+            docs = json.loads(literal)
+        except ValueError:
+            return None
+    if not isinstance(docs, list):
+        return None
+    return doc_items(docs) or None
+
+
+class NewsListParser(HTMLParser):
+    """解析 ul#ent0 下的新闻列表：每个 li 取 .left img 的 src 和 .news_title 的文字"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.items: list[dict] = []
+        self._depth = 0  # 在 ul#ent0 内的嵌套层数
+        self._item: dict | None = None
+        self._left = 0  # 在 .left 内的层数
+        self._title = 0  # 在 .news_title 内的层数
+        self._text: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attr = dict(attrs)
+        classes = (attr.get("class") or "").split()
+        if self._depth == 0:
+            if tag == "ul" and attr.get("id") == "ent0":
+                self._depth = 1
+            return
+        if tag not in VOID_TAGS:
+            self._depth += 1
+            self._left += bool(self._left) or "left" in classes
+            self._title += bool(self._title) or "news_title" in classes
+        if tag == "li" and self._item is None:
+            self._item = {"img_src": "", "news_title": ""}
+            self._text = []
+        if tag == "img" and self._left and self._item is not None and not self._item["img_src"]:
+            self._item["img_src"] = attr.get("src") or ""
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._depth == 0 or tag in VOID_TAGS:
+            return
+        self._depth -= 1
+        self._left = max(0, self._left - 1)
+        if self._title:
+            self._title -= 1
+            if not self._title and self._item is not None:
+                self._item["news_title"] = "".join(self._text).strip()
+        if tag == "li" and self._item is not None:
+            if self._item["img_src"] and self._item["news_title"]:
+                self.items.append(self._item)
+            self._item = None
+
+    def handle_data(self, data: str) -> None:
+        if self._title:
+            self._text.append(data)
+
+
+def parse_news_dom(html: str) -> list[dict] | None:
+    """从静态 HTML 中解析新闻列表，没有条目返回 None"""
+    parser = NewsListParser()
+    parser.feed(html)
+    parser.close()
+    return parser.items or None
+
+
+def absolute_images(items: list[dict] | None, base: str) -> list[dict] | None:
+    """img_src 按页面地址补全为绝对 URL，与浏览器读取的 img.src 一致"""
+    if not items:
+        return items
+    return [{**item, "img_src": urljoin(base, item["img_src"])} for item in items]
+
+
 class CnImgLoader(DataLoader):
-    def __init__(self, headless=True):
-        """初始化爬虫"""
+    def __init__(self, headless=True, pool: BrowserPool | None = None, mode: str = "auto"):
+        """初始化爬虫，浏览器只在 HTTP 解析失败时才从会话池借用"""
+        if mode not in LOAD_MODES:
+            raise ValueError(f"未知的 mode: {mode}, 可选 {LOAD_MODES}")
         self.news_data = []
-        self.df = pd.DataFrame()
-
-        # 配置Chrome选项
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument(f"--user-agent={user_agent}")
-
-        # 初始化WebDriver
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 10)
+        self.df = news_frame([])
+        self.mode = mode
+        self.source: str | None = None  # 本次数据来自 http-docArr / http-script / http-dom / browser
+        self.headless = headless
+        self._pool = pool
+
+    @property
+    def pool(self) -> BrowserPool:
+        if self._pool is None:
+            self._pool = BROWSERS if self.headless else BrowserPool(size=1, headless=False)
+        return self._pool
+
+    def fetch_http(self, url_key: str) -> list[dict] | None:
+        """
+        不启动浏览器，直接请求页面解析 docArr；
+        页面内没有时依次尝试同站的外链脚本，最后退回解析静态列表
+        """
+        url = data_sources.get(url_key, url_key)
+        try:
+            resp = SESSION.get(url, timeout=HTTP_TIMEOUT)
+            resp.raise_for_status()
+            resp.encoding = resp.apparent_encoding if resp.encoding in (None, "ISO-8859-1") else resp.encoding
+            html = resp.text
+        except RequestException as e:
+            logger.warning(f"HTTP 获取 {url} 失败: {e}")
+            return None
+        items = parse_doc_arr(html)
+        if items:
+            self.source = "http-docArr"
+            return absolute_images(items, url)
+        host = urljoin(url, "/")
+        scripts = [urljoin(url, s) for s in SCRIPT_SRC_RE.findall(html)]
+        for src in [s for s in scripts if "chinanews" in s or s.startswith(host)][:MAX_DATA_SCRIPTS]:
+            try:
+                resp = SESSION.get(src, timeout=HTTP_TIMEOUT)
+                resp.encoding = resp.apparent_encoding if resp.encoding in (None, "ISO-8859-1") else resp.encoding
+                items = parse_doc_arr(resp.text)
+            except RequestException as e:
+                logger.debug(f"脚本 {src} 获取失败: {e}")
+                continue
+            if items:
+                self.source = "http-script"
+                # 脚本里的相对地址按所在页面解析，和浏览器一致
+                return absolute_images(items, url)
+        items = parse_news_dom(html)
+        if items:
+            self.source = "http-dom"
+        return absolute_images(items, url)
+
+    def iter_news(self, url: str) -> Iterator[dict]:
+        """
+        产出带序号的记录 {index, img_src, news_title}；HTTP 解析失败时才借用浏览器
+        页面整体解析完才开始产出，不是边下载边解析的流式接口
+        """
+        self.source = None
+        items = None
+        if self.mode != "browser":
+            items = self.fetch_http(url)
+            if not items and self.mode == "auto":
+                logger.info("HTTP 解析失败，改用浏览器")
+        if not items and self.mode != "http":
+            self.source = "browser"
+            with self.pool.session() as driver:
+                self.driver = driver
+                self.wait = WebDriverWait(driver, 10)
+                items = self.scrape(url)
+        for i, item in enumerate(items or []):
+            yield {"index": i + 1, **item}
 
     def load_page(self, url_key:str):
         """加载网页"""
@@ -50,10 +231,9 @@ class CnImgLoader(DataLoader):
             print(f"正在加载网页: {url}")
             self.driver.get(url)
 
-            # 等待页面加载完成
-            self.wait.until(EC.presence_of_element_located((By.ID, "ent0")))
+            # 等待 docArr 或新闻列表真正填充，而不是固定等待
+            wait_for_js(self.driver, READY_SCRIPT)
             print("网页加载完成")
-            time.sleep(2)  # 额外等待确保JS执行完成
 
         except TimeoutException:
             print("页面加载超时")
@@ -64,8 +244,9 @@ class CnImgLoader(DataLoader):
 
         return True
 
-    def extract_from_dom(self):
+    def extract_from_dom(self) -> list[dict] | None:
         """从DOM中提取数据"""
+        items = []
         try:
             # 查找新闻列表容器
             news_list = self.wait.until(
@@ -88,15 +269,7 @@ class CnImgLoader(DataLoader):
                     title_element = item.find_element(By.CSS_SELECTOR, ".news_title")
                     news_title = title_element.text.strip()
 
-                    # 添加到数据列表
-                    news_item = {
-                        "index": i + 1,
-                        "img_src": img_src,
-                        "news_title": news_title,
-                    }
-                    self.news_data.append(news_item)
-
-                    print(f"提取到第 {i + 1} 条: {news_title[:30]}...")
+                    items.append({"img_src": img_src, "news_title": news_title})
 
                 except Exception as e:
                     print(f"提取第 {i + 1} 个新闻项时出错: {e}")
@@ -104,44 +277,24 @@ class CnImgLoader(DataLoader):
 
         except Exception as e:
             print(f"从DOM提取数据时出错: {e}")
-            return False
+            return None
 
-        return True
+        return items or None
 
-    def extract_from_javascript(self):
+    def extract_from_javascript(self) -> list[dict] | None:
         """从JavaScript变量中提取数据"""
         try:
             # 获取页面中的docArr变量
-            doc_arr_script = "return docArr;"
-            doc_arr = self.driver.execute_script(doc_arr_script)
-
-            if doc_arr:
-                print(f"从JavaScript变量中找到 {len(doc_arr)} 条新闻数据")
-
-                for i, doc in enumerate(doc_arr):
-                    # 提取图片URL和标题
-                    img_src = doc.get("img", "")
-                    news_title = doc.get("title", "")
-
-                    if img_src and news_title:  # 只处理有图片和标题的新闻
-                        news_item = {
-                            "index": i + 1,
-                            "img_src": img_src,
-                            "news_title": news_title,
-                        }
-                        self.news_data.append(news_item)
-                        self.df = pd.DataFrame(self.news_data)
-                        # print(f"提取到第 {i + 1} 条: {news_title[:30]}...")
-                logger.info(f'{self.df.shape} fetched')
-
-                return True
-            else:
-                print("未找到docArr变量")
-                return False
-
+            doc_arr = self.driver.execute_script("return docArr;")
         except Exception as e:
             print(f"从JavaScript变量提取数据时出错: {e}")
-            return False
+            return None
+
+        if not doc_arr:
+            print("未找到docArr变量")
+            return None
+        print(f"从JavaScript变量中找到 {len(doc_arr)} 条新闻数据")
+        return doc_items(doc_arr) or None
 
     def save_data(self, filename="news_data.json"):
         """保存数据到JSON文件"""
@@ -167,36 +320,40 @@ class CnImgLoader(DataLoader):
         print(f"\n总计提取到 {len(self.news_data)} 条新闻")
 
     def fetch(self, url:str):
-        """运行爬虫"""
+        """运行爬虫，每次调用重新开始，结果一次性构建为 DataFrame"""
         print("开始运行新闻图片爬虫...")
+        self.news_data = []
+        self.df = news_frame([])
+        records = list(self.iter_news(url))
+        if not records:
+            print("没有提取到任何数据")
+            return None
+
+        self.news_data = records
+        self.df = news_frame(records)
+        logger.info(f"{self.df.shape} fetched via {self.source}")
+        self.save_data()
+        return self.df
 
-        # 加载页面
+    def scrape(self, url:str) -> list[dict] | None:
+        """在已借到的浏览器会话中加载页面并提取数据"""
         if not self.load_page(url):
             return None
 
         # 尝试从JavaScript变量提取数据（更可靠）
-        if not self.extract_from_javascript():
+        items = self.extract_from_javascript()
+        if not items:
             # 如果JS方法失败，尝试从DOM提取
             print("尝试从DOM提取数据...")
-            if not self.extract_from_dom():
+            items = self.extract_from_dom()
+            if not items:
                 print("两种方法都失败了")
-                return None
-
-        # 保存和显示结果
-        if self.news_data:
-            self.save_data()
-            # self.print_results()
-            # logger.info(self.df.shape)
-            return self.df
-        else:
-            print("没有提取到任何数据")
-            return None
+        return items
 
     def close(self):
-        """关闭浏览器"""
-        if hasattr(self, "driver"):
-            self.driver.quit()
-            print("浏览器已关闭")
+        """关闭自建的浏览器池；共享池由进程退出时统一关闭"""
+        if self._pool is not None and self._pool is not BROWSERS:
+            self._pool.close()
 
     def clean(self, url: str) -> Any:
         df = self.fetch(url)
@@ -204,11 +361,16 @@ class CnImgLoader(DataLoader):
 
 
 class CnImgBuilder(SlidesBuilder):
+    def __init__(self, mirror: MediaMirror | None = None) -> None:
+        self.mirror = mirror or MediaMirror()
 
     def builder(self, df:pd.DataFrame) -> tuple[list[Deck], str]:
         logger.info(df.columns)
+        # 图片先镜像到 reveal/media 并缩放，镜像失败的仍引用原地址
+        local = self.mirror.mirror(df['img_src'].tolist())
         decks = [
-            Deck('img', t[2], t[3]) for t in df.itertuples()
+            Deck('img', local.get(src, src), title)
+            for src, title in zip(df['img_src'], df['news_title'])
         ]
         return (decks, '{}')
 
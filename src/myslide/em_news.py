@@ -4,6 +4,7 @@ import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from myslide.models import DataLoader, SlidesBuilder, Deck
+from myslide.cache import CACHE
 
 
 TODAY = datetime.now().strftime("%Y-%m-%d")
@@ -14,25 +15,15 @@ DATA_URL = {
 
 class EmNewsLoader(DataLoader):
         
-    def fetch(self, url:str) -> pd.DataFrame:
-        cache_file = CACHE_DIR / f"{TODAY}news_em.csv"
-        if cache_file.exists():
-            logger.info(f"Cache file exists: {cache_file}")
-            df = pd.read_csv(cache_file)
-            return df
+    def fetch(self, url:str, columns: list[str] | None = None) -> pd.DataFrame:
         try:
-            df = DATA_URL[url]()
-            logger.info(f"spot_em data fetched successfully: {df.shape}")
-            CACHE_DIR.mkdir(parents=True, exist_ok=True)
-            df.to_csv(cache_file, index=False)
-            return df
+            return CACHE.get_or_fetch('news_em', DATA_URL[url], columns=columns)
         except Exception as e:
             logger.error(f"Failed to fetch data: {e}")
             raise
 
     def clean(self, url:str):
-        df = self.fetch(url)
-        sel = df[['标题','摘要','发布时间']]
+        sel = self.fetch(url, columns=['标题','摘要','发布时间'])
         return sel
     
 
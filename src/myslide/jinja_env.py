@@ -0,0 +1,48 @@
+from functools import cache
+from pathlib import Path
+
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    TemplateError,
+    TemplateSyntaxError,
+)
+from loguru import logger
+
+from myslide.cache import CACHE_DIR
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+BYTECODE_DIR = CACHE_DIR / "_jinja"
+TEMPLATE_SUFFIX = ".html.jinja"
+
+
+@cache
+def get_env() -> Environment:
+    """
+    进程内共享的模板环境
+    编译结果留在 Environment 的模板缓存中，字节码另存到 cache/_jinja，
+    新进程直接加载字节码，不再重新解析模板；模板文件修改后自动失效。
+    """
+    BYTECODE_DIR.mkdir(parents=True, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        bytecode_cache=FileSystemBytecodeCache(str(BYTECODE_DIR)),
+        auto_reload=True,
+    )
+
+
+def validate_templates() -> list[str]:
+    """预编译全部 *.html.jinja，有语法错误时一次性报出所有问题"""
+    env = get_env()
+    names = env.list_templates(filter_func=lambda n: n.endswith(TEMPLATE_SUFFIX))
+    errors = []
+    for name in names:
+        try:
+            env.get_template(name)
+        except TemplateSyntaxError as e:
+            errors.append(f"{name}:{e.lineno}: {e.message}")
+    if errors:
+        raise TemplateError("模板校验失败:\n" + "\n".join(errors))
+    logger.debug(f"{len(names)} templates ready")
+    return names
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from myslide.schema import SPOT
+
+YI = 1e8  # 元 -> 亿元
+PE_COL = SPOT.pe_ratio
+# 一次 rank 调用同时给出的排名列：源列 -> (排名列, 百分位列)
+RANKS = {
+    "净利润": ("净利排名", "p_tier"),
+    "总市值": ("市值排名", "mv_tier"),
+}
+
+
+def clean_spot(df: pd.DataFrame, rename: dict[str, str] | None = None) -> pd.DataFrame:
+    """
+    行情快照（ak.stock_zh_a_spot_em）清洗，按列名取值：
+    去掉含缺失值的行，成交额/总市值换算为亿元，派生 净利润 = 总市值/市盈率、净资产 = 总市值/市净率，
+    净利润和总市值在一次 rank 中得到名次和百分位（p_tier / mv_tier，0~100，越小越靠前）。
+    不做字符串格式化，展示时再用 table_render.format_frame。
+    """
+    out = df.dropna(how="any")
+    amount = out["成交额"].to_numpy(dtype="float64", copy=True)
+    mv = out["总市值"].to_numpy(dtype="float64", copy=True)
+    amount /= YI
+    mv /= YI
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit = mv / out[PE_COL].to_numpy(dtype="float64")
+        equity = mv / out["市净率"].to_numpy(dtype="float64")
+
+    values = pd.DataFrame({"净利润": profit, "总市值": mv}, index=out.index)
+    ranks = values.rank(ascending=False)
+    # 清洗后没有缺失值，pct=True 的百分位即 名次 / 行数
+    tiers = (ranks / max(len(values), 1) * 100).round(3)
+
+    derived: dict[str, object] = {"序号": 1, "成交额": amount, "总市值": mv, "净利润": profit, "净资产": equity}
+    for col, (rank_col, tier_col) in RANKS.items():
+        derived[rank_col] = ranks[col]
+        derived[tier_col] = tiers[col]
+    out = out.assign(**derived)
+    return out.rename(columns=rename) if rename else out
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from loguru import logger
+from PIL import Image, ImageOps
+from requests import RequestException
+
+from myslide.fetching import http_session
+from myslide.fileio import atomic_write
+from myslide.slide_render import REVEAL_DIR
+
+MEDIA_DIR = REVEAL_DIR / "media"
+MEDIA_WORKERS = 8
+MEDIA_TIMEOUT = 15.0
+MEDIA_TTL = 14 * 24 * 3600  # 超过两周未被引用的图片删除
+DISPLAY_SIZE = (1600, 900)  # 与 reveal 页面尺寸一致
+JPEG_QUALITY = 82
+
+
+def media_name(url: str) -> str:
+    """同一 URL 始终对应同一个本地文件名"""
+    return hashlib.blake2b(url.encode(), digest_size=12).hexdigest() + ".jpg"
+
+
+def downscale(data: bytes, size: tuple[int, int] = DISPLAY_SIZE, quality: int = JPEG_QUALITY) -> bytes:
+    """缩小到显示分辨率以内（不放大），统一转为渐进式 JPEG"""
+    with Image.open(BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        out = BytesIO()
+        img.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+class MediaMirror:
+    """
+    远程图片镜像到 reveal/media，页面改为引用本地文件
+    连接池并发下载，按 URL 哈希去重；已有文件直接复用，只刷新修改时间
+    """
+
+    def __init__(
+        self,
+        media_dir: Path = MEDIA_DIR,
+        workers: int = MEDIA_WORKERS,
+        size: tuple[int, int] = DISPLAY_SIZE,
+        quality: int = JPEG_QUALITY,
+    ) -> None:
+        self.media_dir = media_dir
+        self.workers = workers
+        self.size = size
+        self.quality = quality
+        self.session = http_session(pool_size=workers)
+
+    def relpath(self, name: str) -> str:
+        """相对页面（reveal/*.html）的引用路径"""
+        return f"{self.media_dir.name}/{name}"
+
+    def fetch_one(self, url: str) -> str | None:
+        """下载并缩放单张图片，返回相对路径；失败返回 None"""
+        name = media_name(url)
+        path = self.media_dir / name
+        if path.exists():
+            os.utime(path)
+            return self.relpath(name)
+        try:
+            # 页面里的图片地址可能省略协议（//img.chinanews.com/...）
+            resp = self.session.get(f"https:{url}" if url.startswith("//") else url, timeout=MEDIA_TIMEOUT)
+            resp.raise_for_status()
+            data = downscale(resp.content, self.size, self.quality)
+        except (RequestException, OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning(f"图片镜像失败 {url}: {e}")
+            return None
+        atomic_write(path, data)
+        return self.relpath(name)
+
+    def mirror(self, urls: list[str]) -> dict[str, str]:
+        """批量镜像，返回 {远程 URL: 本地相对路径}，失败的 URL 不在结果中"""
+        unique = list(dict.fromkeys(u for u in urls if u))
+        if not unique:
+            return {}
+        self.media_dir.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="media") as pool:
+            local = dict(zip(unique, pool.map(self.fetch_one, unique)))
+        result = {u: p for u, p in local.items() if p is not None}
+        logger.info(f"图片镜像 {len(result)}/{len(unique)}，用时 {time.perf_counter() - t0:.1f}s")
+        self.prune()
+        return result
+
+    def prune(self, ttl: float = MEDIA_TTL) -> int:
+        """删除长期未被引用的图片"""
+        now = time.time()
+        removed = 0
+        for f in self.media_dir.glob("*.jpg"):
+            if now - f.stat().st_mtime > ttl:
+                f.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def close(self) -> None:
+        self.session.close()
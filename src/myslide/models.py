@@ -21,4 +21,4 @@ class SlidesBuilder(Protocol):
     def builder(self, df) -> Any: ...
 
 class Render(Protocol):
-    def render_page(self, decks:list[Deck], fn:str, chart_options:str = '{}') -> None: ...
+    def render_page(self, decks:list[Deck], fn:str, chart_options:dict | str = '{}') -> None: ...
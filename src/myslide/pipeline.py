@@ -1,16 +1,26 @@
 from myslide.models import DataLoader, SlidesBuilder, Render
-from myslide.slide_render import TEMPLATE_DIR, SlideRender
+from myslide.slide_render import SlideRender
+from myslide.jinja_env import get_env, validate_templates
+from myslide.scheduler import PipelineScheduler, MAX_WORKERS, DEFAULT_TIMEOUT
+from myslide.cache import CacheManager, app as cache_app
 from loguru import logger
 from typer import Typer
 import importlib
 from dataclasses import dataclass
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+import time
 
 LINES = ['cn_img', 'sw_indu', 'em_news', 'cidx399317']
 TIMES = [240000, 240000, 600000, 300000]
 
 app = Typer()
+app.add_typer(cache_app, name="cache", help="查看和清理 cache/ 目录")
+
+
+@app.callback()
+def startup():
+    """启动时预编译并校验全部模板"""
+    validate_templates()
 
 @dataclass
 class SlidePipeline:
@@ -19,14 +29,40 @@ class SlidePipeline:
     builder: SlidesBuilder
     render: Render
     
-    def run(self, data_url: str, fn: str) -> None:
-        """运行流水线"""
+    def run(
+        self,
+        data_url: str,
+        fn: str,
+        timings: dict[str, float] | None = None,
+        deadline: float | None = None,
+    ) -> None:
+        """
+        运行流水线，分 load(fetch+clean) / build / render 三个阶段
+        timings: 记录各阶段耗时（秒）
+        deadline: time.perf_counter() 截止时间，超过后不再进入下一阶段
+        """
         logger.info(f"开始处理: {data_url}")
-        
-        df = self.loader.clean(data_url)
-        decks, chart_options = self.builder.builder(df)
-        self.render.render_page(decks, fn, chart_options)
-        
+        timings = {} if timings is None else timings
+
+        def stage(name: str, func, *args):
+            if deadline is not None and time.perf_counter() > deadline:
+                raise TimeoutError(f"{fn} 在 {name} 阶段前超时")
+            t0 = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                timings[name] = time.perf_counter() - t0
+
+        try:
+            df = stage("load", self.loader.clean, data_url)
+            decks, chart_options = stage("build", self.builder.builder, df)
+            stage("render", self.render.render_page, decks, fn, chart_options)
+        finally:
+            # 释放 loader 持有的浏览器等外部资源
+            close = getattr(self.loader, "close", None)
+            if callable(close):
+                close()
+
         logger.success(f"处理完成: {fn}")
 
 def create_pipeline(name: str) -> SlidePipeline:
@@ -82,23 +118,24 @@ def run_pipeline(name: str, data_url: str | None = None, fn: str | None = None):
 
 
 @app.command()
-def run_all():
-    """运行多个流水线"""
-    
-    for name in LINES:
-        try:
-            logger.info(f"开始运行流水线: {name}")
-            pipeline = create_pipeline(name)
-            pipeline.run(name, f"{name}_report")
-            logger.success(f"流水线 {name} 运行成功")
-        except Exception as e:
-            logger.error(f"流水线 {name} 运行失败: {e}")
+def run_all(workers: int = MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT, prune: bool = True):
+    """
+    并行运行多个流水线，结束后按保留规则清理缓存
+    --timeout 为软超时：到时不再等待该流水线，它的线程随进程退出结束
+    """
+    scheduler = PipelineScheduler(max_workers=workers, timeout=timeout)
+    results = scheduler.run(LINES, create_pipeline)
+    stuck = [res.name for res in results if res.running]
+    if prune and stuck:
+        # 超时的流水线可能还在写缓存，这次不清理
+        logger.warning(f"{stuck} 超时后仍在运行，跳过缓存清理")
+    elif prune:
+        CacheManager().prune()
 
 @app.command()     
 def update_starter():
-    template_path = Path(__file__).parent / 'templates'
     reveal_dir: Path = Path(__file__).parent.parent.parent / 'reveal'
-    env = Environment(loader=FileSystemLoader(template_path))
+    env = get_env()
     src = [f'./{i}_report.html' for i in LINES]
     data = [{'src': s, 'duration':t} for s, t in list(zip(src, TIMES))]
     starter_html = env.get_template('starter.html.jinja').render(pages = data)
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 900.0
+
+
+@dataclass
+class PipelineResult:
+    """单条流水线的运行结果"""
+    name: str
+    status: str = "pending"  # pending / running / ok / failed / timeout
+    timings: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+    started: float | None = None
+    finished: bool = False
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def running(self) -> bool:
+        """线程仍在执行（包括已判定超时但还没返回的）"""
+        return self.started is not None and not self.finished
+
+
+class PipelineScheduler:
+    """
+    并行运行多条互不依赖的流水线
+    每条流水线在工作线程中按 load -> build -> render 依次执行，
+    网络等待与其它流水线的构建、渲染相互重叠；单条失败或超时不影响其它流水线。
+    超时是软超时：线程无法被强制终止，run() 到时即返回并另起线程补位，
+    超时的线程继续在后台运行。工作线程是守护线程，进程退出时不会等它，
+    调用方可用 PipelineResult.running 判断是否还有线程在写文件。
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def _run_one(self, name: str, factory: Callable, result: PipelineResult) -> PipelineResult:
+        result.status = "running"
+        result.started = time.perf_counter()
+        deadline = result.started + self.timeout
+        try:
+            pipeline = factory(name)
+            pipeline.run(name, f"{name}_report", timings=result.timings, deadline=deadline)
+            status, error = "ok", None
+        except TimeoutError as e:
+            status, error = "timeout", str(e)
+        except Exception as e:  # noqa: BLE001 单条流水线的任何错误都记入结果，不能让工作线程退出
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        # 主线程可能已判定超时，此时保留超时结论
+        if result.status == "running":
+            result.status, result.error = status, error
+        result.finished = True
+        return result
+
+    def _worker(self, todo: queue.SimpleQueue, done: queue.SimpleQueue, factory: Callable, results: dict) -> None:
+        while True:
+            try:
+                name = todo.get_nowait()
+            except queue.Empty:
+                return
+            done.put(self._run_one(name, factory, results[name]))
+
+    def _spawn(self, *args) -> None:
+        # 守护线程：卡死的 Selenium/akshare 调用不会拖住解释器退出
+        threading.Thread(target=self._worker, args=args, name="pipeline", daemon=True).start()
+
+    def run(self, names: list[str], factory: Callable) -> list[PipelineResult]:
+        results = {name: PipelineResult(name) for name in names}
+        t0 = time.perf_counter()
+        todo: queue.SimpleQueue[str] = queue.SimpleQueue()
+        done: queue.SimpleQueue[PipelineResult] = queue.SimpleQueue()
+        for name in names:
+            todo.put(name)
+        args = (todo, done, factory, results)
+        for _ in range(min(self.max_workers, len(names))):
+            self._spawn(*args)
+
+        remaining = set(names)
+        while remaining:
+            try:
+                res = done.get(timeout=1.0)
+            except queue.Empty:
+                res = None
+            if res is not None and res.name in remaining:
+                remaining.discard(res.name)
+                if res.status == "ok":
+                    logger.success(f"流水线 {res.name} 完成: {res.elapsed:.1f}s")
+                else:
+                    logger.error(f"流水线 {res.name} {res.status}: {res.error}")
+            now = time.perf_counter()
+            for name in list(remaining):
+                res = results[name]
+                if res.started is not None and now - res.started > self.timeout:
+                    res.status = "timeout"
+                    res.error = f"超过 {self.timeout:.0f}s 未完成"
+                    logger.error(f"流水线 {res.name} timeout")
+                    remaining.discard(name)
+                    # 超时的线程仍占着，补一个线程继续处理排队的流水线
+                    self._spawn(*args)
+
+        logger.info(f"全部流水线耗时 {time.perf_counter() - t0:.1f}s")
+        self.report(list(results.values()))
+        return list(results.values())
+
+    @staticmethod
+    def report(results: list[PipelineResult]) -> None:
+        for res in results:
+            stages = " ".join(f"{k}={v:.1f}s" for k, v in res.timings.items())
+            logger.info(f"{res.name:<12} {res.status:<8} {stages}")
@@ -0,0 +1,131 @@
+import re
+from dataclasses import dataclass
+
+import pandas as pd
+from loguru import logger
+
+CODE_RE = re.compile(r"^\d{6}$")
+# 数值列中无法解析的非空值超过该比例，视为列错位（上游偶尔用 "-" 占位，少量容忍）
+MAX_BAD_SHARE = 0.5
+# 分类列的类别用 Arrow 字符串存储，比 object 字符串紧凑得多
+CATEGORY_STRING = "string[pyarrow]"
+
+
+class SchemaError(ValueError):
+    """数据与声明的结构不符"""
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str  # 上游列名
+    key: str  # 英文访问名
+    dtype: str  # "category" / "code" / "int32" / "float32" / "float64"
+    decimals: int | None = None  # float32 列上游保留的小数位，widen 时据此还原
+
+
+@dataclass(frozen=True)
+class Schema:
+    """
+    声明式的表结构：列名、紧凑 dtype 和英文访问名
+    conform() 在加载时校验并转换类型；SPOT.turnover 之类的属性返回列名，代替按位置取列。
+    """
+    dataset: str
+    fields: tuple[Field, ...]
+
+    def __getattr__(self, key: str) -> str:
+        if not key.startswith("_"):
+            for f in self.fields:
+                if f.key == key:
+                    return f.name
+        raise AttributeError(key)
+
+    @property
+    def columns(self) -> list[str]:
+        return [f.name for f in self.fields]
+
+    def names(self, *keys: str) -> list[str]:
+        """按访问名取一组列名"""
+        return [getattr(self, k) for k in keys]
+
+    def conform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        校验并转换为声明的 dtype，返回新表：声明的列在前、按声明顺序，其余列原样保留在后
+        缺列、代码不是六位数字、数值列大半无法解析时抛出 SchemaError，不让错位的数据进入幻灯片
+        """
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise SchemaError(f"{self.dataset} 缺少列: {missing}，上游列为 {list(df.columns)}")
+        data = {f.name: self._cast(df[f.name], f) for f in self.fields}
+        extra = [c for c in df.columns if c not in data]
+        if extra:
+            logger.debug(f"{self.dataset} 未声明的列: {extra}")
+        data.update({c: df[c] for c in extra})
+        return pd.DataFrame(data, index=df.index)
+
+    def _cast(self, s: pd.Series, f: Field) -> pd.Series:
+        if f.dtype == "code":
+            # CSV 往返后代码会变成整数，统一补齐为六位字符串
+            text = s.astype(str).str.replace(r"\.0$", "", regex=True).str.zfill(6)
+            bad = text[~text.str.match(CODE_RE)]
+            if len(bad):
+                raise SchemaError(f"{self.dataset}.{f.name} 含非法代码: {bad.head(5).tolist()}")
+            return text.astype(CATEGORY_STRING).astype("category")
+        if f.dtype == "category":
+            return s.astype(CATEGORY_STRING).astype("category")
+        values = pd.to_numeric(s, errors="coerce")
+        bad = int(values.isna().sum() - s.isna().sum())
+        if bad and bad > MAX_BAD_SHARE * max(int(s.notna().sum()), 1):
+            raise SchemaError(f"{self.dataset}.{f.name} 不是数值列: {s.dropna().head(5).tolist()}")
+        if f.dtype == "int32" and values.isna().any():
+            raise SchemaError(f"{self.dataset}.{f.name} 含缺失值，无法存为整数")
+        return values.astype(f.dtype)
+
+    def widen(self, df: pd.DataFrame, rename: dict[str, str] | None = None) -> pd.DataFrame:
+        """
+        float32 列转回 float64 并按上游小数位取整，对外输出时不带 44.040000915527344 这样的尾数
+        rename: 清洗时改过名的列，{上游列名: 现列名}
+        """
+        rename = rename or {}
+        wide = {
+            col: df[col].astype("float64").round(f.decimals)
+            for f in self.fields
+            if f.dtype == "float32" and (col := rename.get(f.name, f.name)) in df.columns
+        }
+        return df.assign(**wide) if wide else df
+
+
+# ak.stock_zh_a_spot_em 行情快照
+# 成交量/成交额/市值用 float64：需要求和且数值超出 float32 的 7 位有效数字；其余列最多两位小数，float32 足够
+SPOT = Schema(
+    "spot_em",
+    (
+        Field("序号", "seq", "int32"),
+        Field("代码", "symbol", "code"),
+        Field("名称", "name", "category"),
+        Field("最新价", "current_price", "float32", 2),
+        Field("涨跌幅", "change_percent", "float32", 2),
+        Field("涨跌额", "change_amount", "float32", 2),
+        Field("成交量", "volume", "float64"),
+        Field("成交额", "turnover", "float64"),
+        Field("振幅", "amplitude", "float32", 2),
+        Field("最高", "high", "float32", 2),
+        Field("最低", "low", "float32", 2),
+        Field("今开", "open_price", "float32", 2),
+        Field("昨收", "prev_close", "float32", 2),
+        Field("量比", "volume_ratio", "float32", 2),
+        Field("换手率", "turnover_rate", "float32", 2),
+        Field("市盈率-动态", "pe_ratio", "float32", 2),
+        Field("市净率", "pb_ratio", "float32", 2),
+        Field("总市值", "total_market_cap", "float64"),
+        Field("流通市值", "circulating_market_cap", "float64"),
+        Field("涨速", "speed_up", "float32", 2),
+        Field("5分钟涨跌", "five_min_change", "float32", 2),
+        Field("60日涨跌幅", "sixty_day_change", "float32", 2),
+        Field("年初至今涨跌幅", "ytd_change", "float32", 2),
+    ),
+)
+
+
+def footprint(df: pd.DataFrame) -> float:
+    """DataFrame 实际占用内存（MB），含字符串内容"""
+    return float(df.memory_usage(deep=True).sum()) / 2**20
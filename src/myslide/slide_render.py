@@ -1,40 +1,189 @@
+from collections import Counter
 from datetime import datetime
+from typing import Any
+from collections.abc import Iterable
 from loguru import logger
-from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
 
+import pandas as pd
+
+from myslide.cache import CACHE_DIR
+from myslide.charts import inline, write_chart_files, write_charts
+from myslide.fileio import atomic_path, atomic_write
+from myslide.jinja_env import TEMPLATE_DIR, TEMPLATE_SUFFIX, get_env
 from myslide.models import Deck, Render
+from myslide.table_render import TABLE_RENDER_VERSION, render_table
 
 TODAY = datetime.now().strftime("%Y-%m-%d")
-TEMPLATE_DIR = Path(__file__).parent / "templates"
+REVEAL_DIR = Path(__file__).parent.parent.parent / 'reveal'
+RENDER_CACHE_DIR = CACHE_DIR / "_render"
+RENDER_CACHE_TTL = 7 * 24 * 3600  # 片段超过一周未使用即删除
+# 图表数据的输出方式 lazy: 每个图表一个文件，按页加载；bundle: 合成一个文件；inline: 写进页面
+CHART_MODES = ("lazy", "bundle", "inline")
+CHART_MODE = "lazy"
+KEEP_CHARTS = 2  # 与当前页相距超过此页数的图表实例会被销毁
+
+
+def stream_to_file(output: Path, chunks: Iterable[str]) -> None:
+    """
+    边渲染边写入同目录下的临时文件，完成后原子改名
+    内存中只保留当前片段，轮播页读到的永远是完整的旧文件或新文件
+    """
+    with atomic_path(output) as tmp, open(tmp, "w", encoding="utf-8") as file:
+        file.writelines(chunks)
+
+
+def fingerprint(data: Any) -> bytes:
+    """甲板数据的内容指纹，DataFrame/Series 用 pandas 的向量化哈希"""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        h.update(type(data).__name__.encode())
+        h.update(repr(data.dtypes if isinstance(data, pd.DataFrame) else data.dtype).encode())
+        h.update(repr(list(data.columns) if isinstance(data, pd.DataFrame) else data.name).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        except TypeError:
+            # 单元格里有 list 等不可哈希对象时退回文本
+            h.update(data.to_json(force_ascii=False, default_handler=str).encode())
+    elif isinstance(data, str):
+        h.update(data.encode())
+    else:
+        h.update(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode())
+    return h.digest()
+
+
+class DeckCache:
+    """
+    甲板 HTML 片段缓存，键为 模板源码 + 标题 + 每页条数 + 数据 的哈希
+    存放在 cache/_render/{模板}/{模板哈希}/{键}.html，模板文件一改，旧哈希目录整体删除
+    """
+
+    def __init__(self, root: Path = RENDER_CACHE_DIR, ttl: float = RENDER_CACHE_TTL) -> None:
+        self.root = root
+        self.ttl = ttl
+        self._digests: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def template_digest(self, name: str) -> str:
+        mtime = (TEMPLATE_DIR / name).stat().st_mtime
+        with self._lock:
+            cached = self._digests.get(name)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            source = (TEMPLATE_DIR / name).read_bytes()
+            digest = hashlib.blake2b(source, digest_size=8).hexdigest()
+            self._digests[name] = (mtime, digest)
+        self.evict(name, digest)
+        return digest
+
+    def evict(self, name: str, keep: str) -> None:
+        """删除模板旧版本的片段，以及长期未使用的片段"""
+        tdir = self.root / name.removesuffix(TEMPLATE_SUFFIX)
+        if not tdir.exists():
+            return
+        now = time.time()
+        for d in tdir.iterdir():
+            if d.name != keep:
+                shutil.rmtree(d, ignore_errors=True)
+                continue
+            try:
+                for f in d.iterdir():
+                    # 跳过其它线程正在写的临时文件；文件可能在遍历中途被改名或删除
+                    if f.name.startswith("."):
+                        continue
+                    try:
+                        if now - f.stat().st_mtime > self.ttl:
+                            f.unlink(missing_ok=True)
+                    except FileNotFoundError:
+                        continue
+            except FileNotFoundError:
+                continue
+
+    def path(self, deck: Deck) -> Path:
+        name = f"{deck.template}{TEMPLATE_SUFFIX}"
+        tdigest = self.template_digest(name)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((deck.template, deck.title, deck.n_per_page, TABLE_RENDER_VERSION)).encode())
+        h.update(fingerprint(deck.data))
+        return self.root / deck.template / tdigest / f"{h.hexdigest()}.html"
+
+    def get(self, path: Path) -> str | None:
+        if not path.exists():
+            return None
+        os.utime(path)
+        return path.read_text(encoding="utf-8")
+
+    def put(self, path: Path, html: str) -> None:
+        atomic_write(path, html)
+
+
+DECK_CACHE = DeckCache()
 
 
-# (0:序号)(1:代码)(2:名称)(3:最新价)(4:涨跌幅)(5:涨跌额)(6:成交量)(7:成交额)(8:振幅)(9:最高)(10:最低)(11:今开)(12:昨收)(13:量比)(14:换手率)(15:市盈率-动态)(16:市净率)(17:总市值)(18:流通市值)(19:涨速)(20:5分钟涨跌)(21:60日涨跌幅)(22:年初至今涨跌幅)
 class SlideRender(Render):
-    def __init__(self) -> None:
-        self.reveal_dir: Path = Path(__file__).parent.parent.parent / 'reveal'
-        self.env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+    def __init__(
+        self, use_cache: bool = True, chart_mode: str = CHART_MODE, keep_charts: int = KEEP_CHARTS
+    ) -> None:
+        if chart_mode not in CHART_MODES:
+            raise ValueError(f"未知的 chart_mode: {chart_mode}, 可选 {CHART_MODES}")
+        self.reveal_dir: Path = REVEAL_DIR
+        self.env = get_env()
+        self.cache = DECK_CACHE if use_cache else None
+        self.chart_mode = chart_mode
+        self.keep_charts = keep_charts
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
 
     def render_a_deck(self, deck: Deck) -> str:
-        template = self.env.get_template(f"{deck.template}.html.jinja")
-        html_str = template.render(title=deck.title, content=deck.data, n = deck.n_per_page)
+        path = self.cache.path(deck) if self.cache else None
+        if path is not None:
+            html_str = self.cache.get(path)  # type: ignore[union-attr]
+            if html_str is not None:
+                self.hits[deck.template] += 1
+                return html_str
+        self.misses[deck.template] += 1
+        if deck.template == "table" and isinstance(deck.data, pd.DataFrame):
+            # 表格走向量化渲染，不逐页调用 DataFrame.to_html
+            html_str = render_table(deck.data, deck.title, deck.n_per_page)
+        else:
+            template = self.env.get_template(f"{deck.template}.html.jinja")
+            html_str = template.render(title=deck.title, content=deck.data, n = deck.n_per_page)
+        if path is not None:
+            self.cache.put(path, html_str)  # type: ignore[union-attr]
         return html_str
 
+    def report(self) -> None:
+        for name in sorted(set(self.hits) | set(self.misses)):
+            logger.info(f"render cache {name}: hit {self.hits[name]} miss {self.misses[name]}")
+        self.hits.clear()
+        self.misses.clear()
+
     def render_decks(self, decks:list[Deck]):
         deck_html = "\n".join([self.render_a_deck(deck) for deck in decks])
         return deck_html
 
-    def render_page(self, decks: list[Deck], fn: str, chart_options: str ='{}') -> None:
-        
-        decks_html = self.render_decks(decks)
-        logger.info("decks all ready.")
-        page_render = self.env.get_template("page.html.jinja").render
-        page_html = page_render(sections = decks_html, chart_options=chart_options)
+    def render_page(self, decks: list[Deck], fn: str, chart_options: dict | str = '{}') -> None:
+        charts: dict[str, Any] = {"keep_charts": self.keep_charts}
+        has_chart = any(deck.template == "chart" for deck in decks)
+        if has_chart and self.chart_mode == "lazy":
+            charts["charts_url"] = write_chart_files(chart_options, self.reveal_dir, fn)
+        elif has_chart and self.chart_mode == "bundle":
+            charts["charts_url"] = write_charts(chart_options, self.reveal_dir, fn)
+        else:
+            charts["chart_options"] = inline(chart_options)
+        # 逐个甲板渲染并流式写盘，不在内存中拼接整页
+        sections = (self.render_a_deck(deck) for deck in decks)
+        page = self.env.get_template("page.html.jinja")
         output = self.reveal_dir / f'{fn}.html'
-
-        with open(output, "w") as file:
-            file.write(page_html)
-        logger.info(f"{output} saved")
+        stream_to_file(output, page.generate(sections=sections, **charts))
+        logger.info(f"{output} saved: {len(decks)} decks")
+        self.report()
 
 
 def main():
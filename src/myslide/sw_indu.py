@@ -2,11 +2,17 @@ from loguru import logger
 from datetime import datetime
 from pathlib import Path
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+from typing import ClassVar
 from myslide.models import Deck, DataLoader,SlidesBuilder
+from myslide.aggregate import latest, top_n_per_group
+from myslide.fetching import TokenBucket
+from myslide.cache import CACHE
 import akshare as ak
 import pandas as pd
-import time
-from tenacity import retry, stop_after_attempt
+from tenacity import retry, stop_after_attempt, wait_exponential
 
 
 TODAY = datetime.now().strftime("%Y-%m-%d")
@@ -17,47 +23,116 @@ DATA_URL = {
     "sw_second": ak.sw_index_second_info,
     "sw_first": ak.sw_index_first_info,
 }
+SW_WORKERS = 4  # 并发下载成份股的线程数
+SW_RATE = 2.0  # 每秒最多请求次数，取代原先固定的 sleep(0.5)
+SW_REF_TTL = 7 * 24 * 3600  # 申万行业分类很少变动，参考数据缓存一周
+
+
+class SwHierarchy:
+    """
+    申万 1/2/3 级行业参考数据
+    进程内记忆 + cache/sw_ref/*.parquet 文件缓存，超过 ttl 秒才重新请求。
+    """
+
+    _memo: ClassVar[dict[str, tuple[float, pd.DataFrame]]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, ttl: float = SW_REF_TTL) -> None:
+        self.ttl = ttl
+
+    def table(self, url: str) -> pd.DataFrame:
+        """url 为 sw_first / sw_second / sw_indu"""
+        with self._lock:
+            hit = self._memo.get(url)
+            if hit and time.time() - hit[0] < self.ttl:
+                return hit[1]
+
+            # 按写入时的抓取时间判断过期；文件 mtime 每次读取都会刷新，只用于 LRU
+            fetched = CACHE.fetched_at("sw_ref", url)
+            df = None
+            if fetched is not None and time.time() - fetched < self.ttl:
+                df = CACHE.read("sw_ref", url)
+                loaded = fetched
+            if df is None:
+                df = DATA_URL[url]()
+                logger.info(f"{url} reference fetched: {df.shape}")
+                CACHE.write(df, "sw_ref", url)
+                loaded = time.time()
+            self._memo[url] = (loaded, df)
+            return df
+
+    def mapping(self) -> pd.DataFrame:
+        """三级 -> 二级 -> 一级 行业名称映射，列为 行业3 / 行业2 / 行业"""
+        third = self.table("sw_indu")[["行业名称", "上级行业"]]
+        second = self.table("sw_second")[["行业名称", "上级行业"]]
+        third = third.set_axis(["行业3", "行业2"], axis=1)
+        second = second.set_axis(["行业2", "行业"], axis=1)
+        return third.merge(second, on="行业2", how="left").drop_duplicates("行业3")
+
 
 # load data from web
 class SwInduLoader(DataLoader):
-    @retry(stop=stop_after_attempt(3))
+    def __init__(self, workers: int = SW_WORKERS, rate: float = SW_RATE) -> None:
+        self.workers = workers
+        self.limiter = TokenBucket(rate, burst=workers)
+        self.hierarchy = SwHierarchy()
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, max=10),
+        reraise=True,
+    )
     def fetch_tool(self, url: str, symbol: str | None = None) -> pd.DataFrame:
-        sw_cache = CACHE_DIR / "sw"
-        sw_cache.mkdir(parents=True, exist_ok=True)
-        cache_file = sw_cache / f"{TODAY}-{url}{symbol}.csv"
-        if cache_file.exists():
-            logger.info(f"{cache_file.stem} file exists: {cache_file}")
-            df = pd.read_csv(cache_file)
+        df = CACHE.read(url, part=symbol)
+        if df is not None:
             return df
         try:
+            self.limiter.acquire()
             df = DATA_URL[url](symbol) if symbol else DATA_URL[url]()
-            logger.info(f"{cache_file.stem} fetched successfully: {df.shape}")
-            df.to_csv(cache_file, index=False)
+            logger.info(f"{url}{symbol or ''} fetched successfully: {df.shape}")
+            CACHE.write(df, url, part=symbol)
             return df
         except Exception as e:
             logger.error(f"Failed to fetch data: {e}")
             raise
 
     def fetch(self, url: str):
-        cache_file = CACHE_DIR / f"sw_daily_{TODAY}.csv"
-
-        if cache_file.exists():
-            logger.info(f"{cache_file.stem} file exists: {cache_file}")
-            df = pd.read_csv(cache_file)
+        df = CACHE.read("sw_daily")
+        if df is not None:
             return df
 
-        indu_third = self.fetch_tool(url)
-        com_ls = []
-        for s in tqdm(indu_third["行业代码"].tolist()):
-            a_indu = self.fetch_tool('sw_com', s)
-            com_ls.append(a_indu)
-            time.sleep(0.5)
-        df = pd.concat(com_ls, ignore_index=True)
-        df.to_csv(cache_file, index=False)
+        indu_third = self.hierarchy.table(url)
+        codes = indu_third["行业代码"].tolist()
+        df = pd.concat(self.fetch_cons(codes), ignore_index=True)
+        CACHE.write(df, "sw_daily")
 
-        logger.info(f"{cache_file.stem}:{df.shape}")
+        logger.info(f"sw_daily:{df.shape}")
         return df
 
+    def fetch_cons(self, codes: list[str]) -> list[pd.DataFrame]:
+        """
+        并发下载各三级行业成份股，按 codes 顺序返回
+        当天已下载的行业直接读缓存（断点续传），失败的行业在全部任务结束后统一报错，
+        已成功的部分保留在 cache/sw_com/ 中，下次运行只补缺失的行业。
+        """
+        cached = sum(CACHE.exists("sw_com", part=s) for s in codes)
+        logger.info(f"三级行业 {len(codes)} 个，已缓存 {cached} 个")
+
+        results: dict[str, pd.DataFrame] = {}
+        failed: dict[str, Exception] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.fetch_tool, "sw_com", s): s for s in codes}
+            for fut in tqdm(as_completed(futures), total=len(futures)):
+                s = futures[fut]
+                # 网络错误和上游数据异常记为失败，其它异常是代码问题，直接抛出
+                try:
+                    results[s] = fut.result()
+                except (OSError, ValueError, KeyError) as e:
+                    failed[s] = e
+        if failed:
+            raise RuntimeError(f"{len(failed)} 个行业下载失败: {list(failed)[:5]}")
+        return [results[s] for s in codes]
+
     def clean(self, url: str):
         df = self.fetch(url)
         df.columns = [
@@ -79,13 +154,14 @@ class SwInduLoader(DataLoader):
             "营收同增",
             "上季营增",
         ]
-        sw1 = DATA_URL["sw_first"]()
+        # 一级行业表带每日估值，按天缓存；层级映射走 TTL 缓存
+        sw1 = self.fetch_tool("sw_first")
         logger.info("sw1 ready")
-        sw2 = DATA_URL["sw_second"]().set_index("行业名称")["上级行业"]
-        sw3 = DATA_URL["sw_indu"]().set_index("行业名称")["上级行业"]
-        df["行业2"] = sw3[df["行业3"]].values
-        df["行业"] = sw2[df["行业2"]].values
-        df.to_csv(CACHE_DIR / ("sw_clean_" + TODAY + ".csv"))
+        cols = df.columns
+        df = df.drop(columns=["行业", "行业2"]).merge(
+            self.hierarchy.mapping(), on="行业3", how="left"
+        )[cols]
+        CACHE.write(df, "sw_clean")
         logger.info("clean file saved")
         return [df, sw1]
 
@@ -102,7 +178,7 @@ class SwInduBuilder(SlidesBuilder):
             Deck("cover", TODAY, "申万每日行业"),
             *self.sw1(sw1),
         ]
-        return (decks, str(self.chart_options))
+        return (decks, self.chart_options)
 
     def sw1(self, df: pd.DataFrame) -> list[Deck]:
         # ['行业代码', '行业名称', '成份个数', '静态市盈率', 'TTM(滚动)市盈率', '市净率', '静态股息率']
@@ -126,8 +202,10 @@ class SwInduBuilder(SlidesBuilder):
             "TTM(滚动)市盈率",
             "市净率",
         ]:
-            sel = sel.sort_values(i, ascending=False).reset_index(drop=True)
-            decks.append(Deck("table", sel[["行业名称", "成份个数", i]], i))
+            # 只对展示的列排序，不重排整张表；成份个数本身是指标时不重复选列
+            cols = ["行业名称", "成份个数"] + ([i] if i != "成份个数" else [])
+            top = sel[cols].sort_values(i, ascending=False)
+            decks.append(Deck("table", top.reset_index(drop=True), i))
         return decks
 
     def base_plot(self, x: list, y: list, type: str = "line") -> dict:
@@ -145,7 +223,7 @@ class SwInduBuilder(SlidesBuilder):
             "yAxis": {
                 "type": "category",
                 "data": y,
-                "inverse": "true",
+                "inverse": True,
                 "axisLabel": {"fontSize": 36},
             },
             "series": [
@@ -174,17 +252,11 @@ class SwInduBuilder(SlidesBuilder):
         return Deck("chart", title, title)
 
     def top_by_indu(self, df: pd.DataFrame, title_sufix: str = "", topn: int = 10):
-        sel = df.loc[df["日期"] == "2025-12-31"]
-        tops = (
-            sel.sort_values(["行业", "市值"], ascending=[False, False])
-            .groupby("行业")
-            .head(10)
-            .reset_index(drop=True)
-        )
-        chunks = [tops.iloc[i : i + topn] for i in range(0, len(tops), topn)]
+        # 每个行业一张图，取最新一期
+        tops = top_n_per_group(latest(df), "行业", "市值", topn)
         decks = []
-        for c in chunks:
-            title = f"{c['行业'].tolist()[0]}前{topn}大"
+        for indu, c in reversed(tops.items()):
+            title = f"{indu}前{topn}大"
             option = self.hbar_plot(c["市值"].tolist(), c["简称"].tolist())
             self.chart_options[title] = option
             deck = Deck("chart", title, title)
@@ -0,0 +1,139 @@
+import hashlib
+import time
+from html import escape
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 列名 -> (printf 格式, 除数, 后缀)；%d 与 int() 一样截断小数
+FORMAT_RULES: dict[str, tuple[str, float, str]] = {
+    "最新价": ("%.2f", 1, ""),
+    "涨跌额": ("%.2f", 1, ""),
+    "最高": ("%.2f", 1, ""),
+    "最低": ("%.2f", 1, ""),
+    "成交额": ("%.2f", 1, "亿"),
+    "总市值": ("%.2f", 1, "亿"),
+    "净利润": ("%.2f", 1, "亿"),
+    "市盈率": ("%.2f", 1, ""),
+    "市净率": ("%.2f", 1, ""),
+    "换手率": ("%.2f", 1, "%"),
+    "振幅": ("%.2f", 1, "%"),
+    "成交量": ("%.2f", 1e6, "百万"),
+    "p_rank": ("%d", 1, ""),
+    "净利排名": ("%d", 1, ""),
+    "mv_rank": ("%d", 1, ""),
+    "市值排名": ("%d", 1, ""),
+}
+DEFAULT_FLOAT = ("%.2f", 1, "")
+NA_TEXT = ""
+
+
+def _render_version() -> str:
+    """格式化规则与本模块源码的指纹，任何改动都会让 DeckCache 中旧的表格片段失效，无需手动改版本号"""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr((sorted(FORMAT_RULES.items()), DEFAULT_FLOAT, NA_TEXT)).encode())
+    h.update(Path(__file__).read_bytes())
+    return h.hexdigest()
+
+
+TABLE_RENDER_VERSION = _render_version()
+
+
+def format_column(s: pd.Series, col: str | None = None) -> np.ndarray:
+    """整列格式化为字符串数组（object），数值列按 FORMAT_RULES，其余列做 HTML 转义"""
+    col = str(s.name) if col is None else col
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        out = s.astype(object).to_numpy()
+        na = pd.isna(out)
+        out = np.array([escape(str(v)) for v in out], dtype=object)
+        out[na] = NA_TEXT
+        return out
+
+    if col in FORMAT_RULES:
+        fmt, divisor, suffix = FORMAT_RULES[col]
+    elif pd.api.types.is_integer_dtype(s):
+        fmt, divisor, suffix = "%d", 1, ""
+    else:
+        fmt, divisor, suffix = DEFAULT_FLOAT
+    values = s.to_numpy(dtype="float64", na_value=np.nan) / divisor
+    na = ~np.isfinite(values)
+    values[na] = 0
+    if fmt == "%d":
+        out = np.trunc(values).astype("int64").astype(str).astype(object)
+    else:
+        # 整列一次 map，比 numpy 的字符串运算和逐格 apply 都快，且舍入与 printf 完全一致
+        out = np.array(list(map(fmt.__mod__, values.tolist())), dtype=object)
+    if suffix:
+        out = out + suffix
+    out[na] = NA_TEXT
+    return out
+
+
+def format_frame(df: pd.DataFrame, skip: tuple[str, ...] = ()) -> pd.DataFrame:
+    """整表格式化为字符串，skip 中的列保持原值"""
+    return df.assign(**{c: format_column(df[c], c) for c in df.columns if c not in skip})
+
+
+def table_rows(df: pd.DataFrame) -> np.ndarray:
+    """一次性生成所有 <tr>，返回每行 HTML 组成的数组"""
+    rows = np.full(len(df), "<tr>", dtype=object)
+    # 按位置取列，列名重复时也只取到单列，与 to_html 一致
+    for j, col in enumerate(df.columns):
+        rows = rows + "<td>" + format_column(df.iloc[:, j], str(col)) + "</td>"
+    return rows + "</tr>"
+
+
+def render_table(df: pd.DataFrame, title: str | None = None, n: int = 8) -> str:
+    """DataFrame 分页渲染为 reveal <section>，结构与 table.html.jinja 的输出一致"""
+    head = "".join(f"<th>{escape(str(c))}</th>" for c in df.columns)
+    h3 = f"<h3>{title}</h3>\n" if title else ""
+    rows = table_rows(df)
+    sections = []
+    for i in range(0, len(rows), n):
+        sections.append(
+            "<section>\n"
+            f"{h3}"
+            '<table border="1" class="dataframe dataframe">\n'
+            f'<thead><tr style="text-align: right;">{head}</tr></thead>\n'
+            f"<tbody>{''.join(rows[i : i + n])}</tbody>\n"
+            "</table>\n"
+            "</section>"
+        )
+    return "\n".join(sections)
+
+
+def benchmark(rows: int = 5000, n: int = 8, repeat: int = 3) -> dict[str, float]:
+    """与原 table.html.jinja（逐页 to_html）对比，返回各自的平均耗时（秒）"""
+    from myslide.jinja_env import get_env
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "名称": [f"股票{i}" for i in range(rows)],
+            "涨跌幅": rng.normal(0, 3, rows),
+            "市盈率": rng.normal(30, 20, rows),
+            "成交额": rng.gamma(2, 5, rows),
+            "市值排名": np.arange(rows, dtype=float),
+        }
+    )
+    template = get_env().get_template("table.html.jinja")
+    result = {}
+    for name, func in {
+        "jinja_to_html": lambda: template.render(title="bench", content=df, n=n),
+        "render_table": lambda: render_table(df, "bench", n),
+    }.items():
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        result[name] = (time.perf_counter() - t0) / repeat
+    return result
+
+
+def main():
+    for name, seconds in benchmark().items():
+        print(f"{name:<14} {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
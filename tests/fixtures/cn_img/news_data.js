@@ -0,0 +1,3 @@
+var total = 2;
+var docArr = [{"title": "黄河壶口瀑布冰挂", "img": "/cnsupload/2026/02/01/d4.jpg", "url": "/tp/2026/02-01/5.shtml"},
+{"title": "北京冬奥场馆夜景", "img": "https://img.chinanews.com.cn/2026/02/01/e5.jpg", "url": "/tp/2026/02-01/6.shtml"}];
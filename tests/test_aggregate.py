@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from myslide import aggregate
+from myslide.aggregate import pivot_stats, top_n_per_group
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    n = 500
+    df = pd.DataFrame(
+        {
+            "日期": rng.choice(pd.date_range("2026-01-01", periods=12), n),
+            "行业": rng.choice(["银行", "电子", "医药", "煤炭", "汽车"], n),
+            "市值": rng.permutation(n).astype("float64") * 1.5,
+        }
+    )
+    # 缺失值、键缺失和只在部分日期出现的组合
+    df.loc[::17, "市值"] = np.nan
+    df.loc[::23, "行业"] = None
+    df.loc[df["日期"] == df["日期"].min(), "行业"] = "银行"
+    return df
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    aggregate._cache.clear()
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_pivot_stats_matches_pivot_table(frame, categorical):
+    if categorical:
+        frame = frame.assign(行业=frame["行业"].astype("category"))
+    stats = pivot_stats(frame)
+    for name in ("sum", "count", "mean"):
+        expected = frame.pivot_table(index="日期", columns="行业", values="市值", aggfunc=name, observed=True)
+        # pivot_table 对 category 列返回 CategoricalIndex，这里只比较标签
+        expected.columns = pd.Index(list(expected.columns), name="行业")
+        pd.testing.assert_frame_equal(getattr(stats, name), expected, check_dtype=False)
+
+
+def test_pivot_stats_cached_by_content(frame):
+    first = pivot_stats(frame)
+    assert pivot_stats(frame.copy()) is first
+    changed = frame.copy()
+    changed.loc[0, "市值"] = 1e12
+    assert pivot_stats(changed) is not first
+
+
+@pytest.mark.parametrize("n", [1, 3, 200])
+def test_top_n_per_group_matches_nlargest(frame, n):
+    got = top_n_per_group(frame, "行业", "市值", n=n)
+    groups = frame.dropna(subset=["市值"]).groupby("行业", sort=True)
+    assert list(got) == list(groups.groups)
+    for label, sub in groups:
+        pd.testing.assert_frame_equal(got[label], sub.nlargest(n, "市值"))
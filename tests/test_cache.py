@@ -0,0 +1,122 @@
+import os
+import time
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from myslide.cache import CacheManager, CacheStats, FrameCache, Retention
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FrameCache(tmp_path)
+
+
+def test_fetched_at_recorded_on_write(cache):
+    before = time.time()
+    cache.write(pd.DataFrame({"a": [1, 2]}), "sw_ref", "sw_first")
+    fetched = cache.fetched_at("sw_ref", "sw_first")
+    assert fetched is not None and before <= fetched <= time.time()
+    assert cache.fetched_at("sw_ref", "missing") is None
+
+
+def test_stats_flush_accumulates(tmp_path):
+    stats = CacheStats(tmp_path)
+    stats.record("spot_em", hit=True)
+    stats.record("spot_em", hit=False)
+    stats.flush()
+    stats.record("spot_em", hit=True)
+    stats.flush()
+    assert stats.load() == {"spot_em": {"hits": 2, "misses": 1}}
+    # 原子写入不留下临时文件
+    assert [p.name for p in tmp_path.iterdir()] == ["_stats.json"]
+
+
+def test_read_does_not_extend_ttl(cache):
+    cache.write(pd.DataFrame({"a": [1]}), "sw_ref", "sw_first")
+    path = cache.path("sw_ref", "sw_first")
+    week_ago = time.time() - 8 * 24 * 3600
+    fetched = cache.fetched_at("sw_ref", "sw_first")
+    os.utime(path, (week_ago, week_ago))
+
+    df = cache.read("sw_ref", "sw_first")
+    assert df["a"].tolist() == [1]
+    # 读取刷新 mtime（LRU），但抓取时间不变
+    assert path.stat().st_mtime > week_ago
+    assert cache.fetched_at("sw_ref", "sw_first") == fetched
+
+
+def test_sw_hierarchy_refetches_after_ttl(cache, monkeypatch):
+    pytest.importorskip("akshare")
+    from myslide import sw_indu
+
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return pd.DataFrame({"行业名称": ["银行"], "上级行业": ["金融"]})
+
+    monkeypatch.setattr(sw_indu, "CACHE", cache)
+    monkeypatch.setitem(sw_indu.DATA_URL, "sw_first", fetch)
+    monkeypatch.setattr(sw_indu.SwHierarchy, "_memo", {})
+
+    sw_indu.SwHierarchy(ttl=3600).table("sw_first")
+    assert len(calls) == 1
+    monkeypatch.setattr(sw_indu.SwHierarchy, "_memo", {})
+    sw_indu.SwHierarchy(ttl=3600).table("sw_first")  # 命中文件缓存，并刷新 mtime
+    assert len(calls) == 1
+
+    # 抓取时间早于 ttl：即使刚被读过也要重新请求
+    monkeypatch.setattr(sw_indu.SwHierarchy, "_memo", {})
+    monkeypatch.setattr(sw_indu.time, "time", lambda: cache.fetched_at("sw_ref", "sw_first") + 7200)
+    sw_indu.SwHierarchy(ttl=3600).table("sw_first")
+    assert len(calls) == 2
+
+
+def make_entry(root, dataset: str, key: str, size: int = 10, used: float | None = None):
+    path = root / dataset / f"{key}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    if used is not None:
+        os.utime(path, (used, used))
+    return path
+
+
+def test_expired_keeps_recent_and_month_end(tmp_path):
+    rules = {"spot_em": Retention(keep_days=10)}
+    for key in ("2026-01-05", "2026-01-30", "2026-02-01", "2026-02-10", "2026-02-20"):
+        make_entry(tmp_path, "spot_em", key)
+    manager = CacheManager(tmp_path, rules, max_bytes=None)
+    expired = manager.expired(manager.entries(), now=date(2026, 2, 25))
+    # 2026-01-30 是一月最后一份，2026-02-20 在十天内，二月最后一份也是它
+    assert sorted(e.key for e in expired) == ["2026-01-05", "2026-02-01", "2026-02-10"]
+
+
+def test_expired_skips_undated_and_unlimited(tmp_path):
+    rules = {"sw_ref": Retention(keep_days=None), "news_em": Retention(keep_days=1, keep_month_end=False)}
+    make_entry(tmp_path, "sw_ref", "2020-01-01")
+    make_entry(tmp_path, "news_em", "latest")
+    make_entry(tmp_path, "news_em", "2026-02-01")
+    manager = CacheManager(tmp_path, rules, max_bytes=None)
+    expired = manager.expired(manager.entries(), now=date(2026, 2, 25))
+    assert [(e.dataset, e.key) for e in expired] == [("news_em", "2026-02-01")]
+
+
+def test_prune_lru_skips_pinned(tmp_path):
+    now = time.time()
+    rules = {"hist": Retention(keep_days=None, pinned=True), "sw_ref": Retention(keep_days=None)}
+    pinned = make_entry(tmp_path, "hist", "2026-01", size=100, used=now - 300)
+    old = make_entry(tmp_path, "sw_ref", "a", size=100, used=now - 200)
+    recent = make_entry(tmp_path, "sw_ref", "b", size=100, used=now - 100)
+    removed = CacheManager(tmp_path, rules, max_bytes=200).prune()
+    # 最久未用的是 pinned 项，跳过它淘汰下一项
+    assert removed == [old]
+    assert pinned.exists() and recent.exists() and not old.exists()
+
+
+def test_prune_dry_run_keeps_files(tmp_path):
+    rules = {"spot_em": Retention(keep_days=1, keep_month_end=False)}
+    path = make_entry(tmp_path, "spot_em", "2000-01-01")
+    assert CacheManager(tmp_path, rules, max_bytes=None).prune(dry_run=True) == [path]
+    assert path.exists()
@@ -0,0 +1,38 @@
+import os
+import time
+
+from myslide import charts
+from myslide.charts import write_chart_files
+
+
+def age(path, seconds: float) -> None:
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+def test_previous_generation_kept(tmp_path):
+    first = write_chart_files({"a": {"data": [1, 2]}}, tmp_path, "page")
+    old_chart = next((tmp_path / "page.charts").glob("*.json"))
+    second = write_chart_files({"a": {"data": [3, 4]}}, tmp_path, "page")
+    assert first != second
+    # 已打开的页面仍引用旧清单和旧图表文件
+    assert (tmp_path / first).exists()
+    assert old_chart.exists()
+
+
+def test_stale_generation_pruned(tmp_path):
+    first = write_chart_files({"a": {"data": [1, 2]}}, tmp_path, "page")
+    old_chart = next((tmp_path / "page.charts").glob("*.json"))
+    age(tmp_path / first, charts.CHART_TTL + 60)
+    age(old_chart, charts.CHART_TTL + 60)
+    second = write_chart_files({"a": {"data": [3, 4]}}, tmp_path, "page")
+    assert not (tmp_path / first).exists()
+    assert not old_chart.exists()
+    assert (tmp_path / second).exists()
+
+
+def test_rewrite_refreshes_current(tmp_path):
+    name = write_chart_files({"a": {"data": [1, 2]}}, tmp_path, "page")
+    age(tmp_path / name, charts.CHART_TTL + 60)
+    assert write_chart_files({"a": {"data": [1, 2]}}, tmp_path, "page") == name
+    assert time.time() - (tmp_path / name).stat().st_mtime < 60
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pytest
+
+from myslide import cn_img
+from myslide.cn_img import CnImgLoader, absolute_images, parse_doc_arr, parse_news_dom
+
+FIXTURES = Path(__file__).parent / "fixtures" / "cn_img"
+PAGE = cn_img.data_sources["cn_img"]
+
+
+def fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+class FakeResponse:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.encoding = "utf-8"
+        self.apparent_encoding = "utf-8"
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class FakeSession:
+    """按 URL 路径返回本地 fixture，记录请求过的地址"""
+
+    def __init__(self, pages: dict[str, str]) -> None:
+        self.pages = pages
+        self.requested: list[str] = []
+
+    def get(self, url: str, timeout: float | None = None) -> FakeResponse:
+        self.requested.append(url)
+        for path, name in self.pages.items():
+            if path in url:
+                return FakeResponse(fixture(name))
+        raise ConnectionError(url)
+
+
+def test_parse_doc_arr_js_literal():
+    items = parse_doc_arr(fixture("news_docarr.html"))
+    assert items == [
+        {"img_src": "/cnsupload/2026/02/01/a1.jpg", "news_title": "春运首日 各地客流平稳"},
+        {"img_src": "//img.chinanews.com.cn/2026/02/01/b2.jpg", "news_title": "雪后故宫"},
+        {"img_src": "2026/c3.jpg", "news_title": "海南文昌卫星发射"},
+    ]
+
+
+def test_parse_doc_arr_json_script():
+    items = parse_doc_arr(fixture("news_data.js"))
+    assert [i["news_title"] for i in items] == ["黄河壶口瀑布冰挂", "北京冬奥场馆夜景"]
+
+
+def test_parse_doc_arr_missing():
+    assert parse_doc_arr(fixture("news_list.html")) is None
+
+
+def test_parse_news_dom():
+    items = parse_news_dom(fixture("news_list.html"))
+    assert items == [
+        {"img_src": "/cnsupload/2026/02/01/f6.jpg", "news_title": "重庆洪崖洞灯火璀璨"},
+        {"img_src": "g7.jpg", "news_title": "西湖断桥残雪"},
+    ]
+
+
+def test_absolute_images():
+    items = [{"img_src": s, "news_title": "t"} for s in ("/a.jpg", "b.jpg", "//img.x.cn/c.jpg", "https://y.cn/d.jpg")]
+    assert [i["img_src"] for i in absolute_images(items, PAGE)] == [
+        "https://channel.chinanews.com.cn/a.jpg",
+        "https://channel.chinanews.com.cn/u/pic/b.jpg",
+        "https://img.x.cn/c.jpg",
+        "https://y.cn/d.jpg",
+    ]
+
+
+@pytest.mark.parametrize(
+    "pages, source, first",
+    [
+        ({"news.shtml": "news_docarr.html"}, "http-docArr", "https://channel.chinanews.com.cn/cnsupload/2026/02/01/a1.jpg"),
+        (
+            {"news.shtml": "news_script.html", "news_data.js": "news_data.js"},
+            "http-script",
+            "https://channel.chinanews.com.cn/cnsupload/2026/02/01/d4.jpg",
+        ),
+        ({"news.shtml": "news_list.html"}, "http-dom", "https://channel.chinanews.com.cn/cnsupload/2026/02/01/f6.jpg"),
+    ],
+)
+def test_fetch_http(monkeypatch, pages, source, first):
+    session = FakeSession(pages)
+    monkeypatch.setattr(cn_img, "SESSION", session)
+    loader = CnImgLoader(mode="http")
+    items = loader.fetch_http("cn_img")
+    assert loader.source == source
+    assert items[0]["img_src"] == first
+    assert all(i["img_src"].startswith("https://") for i in items)
+    # 只请求同站脚本，不请求第三方统计脚本
+    assert not any("googletagmanager" in u for u in session.requested)
+
+
+def test_fetch_builds_frame(monkeypatch, tmp_path):
+    monkeypatch.setattr(cn_img, "SESSION", FakeSession({"news.shtml": "news_list.html"}))
+    monkeypatch.chdir(tmp_path)  # save_data 写到当前目录
+    loader = CnImgLoader(mode="http")
+    df = loader.fetch("cn_img")
+    assert list(df.columns) == list(cn_img.NEWS_SCHEMA)
+    assert df["index"].tolist() == [1, 2]
+    assert df["img_src"].tolist()[1] == "https://channel.chinanews.com.cn/u/pic/g7.jpg"
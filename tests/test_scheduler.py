@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from myslide import pipeline
+from myslide.scheduler import PipelineResult, PipelineScheduler
+
+
+class FakePipeline:
+    """按名字决定行为：slow 阻塞到 release 被设置，bad 抛异常，其余立即完成"""
+
+    def __init__(self, release: threading.Event) -> None:
+        self.release = release
+
+    def run(self, name, fn, timings=None, deadline=None):
+        if name == "slow":
+            self.release.wait(10)
+        elif name == "bad":
+            raise RuntimeError("boom")
+        timings["load"] = 0.0
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()  # 放行后台仍在等待的线程
+
+
+def test_timeout_spawns_replacement(release):
+    scheduler = PipelineScheduler(max_workers=1, timeout=0.2)
+    results = {r.name: r for r in scheduler.run(["slow", "fast"], lambda name: FakePipeline(release))}
+    # 唯一的工作线程卡在 slow 上，fast 由补位线程完成
+    assert results["slow"].status == "timeout"
+    assert results["fast"].status == "ok"
+    assert results["slow"].running
+    assert not results["fast"].running
+
+
+def test_timed_out_thread_keeps_timeout_status(release):
+    scheduler = PipelineScheduler(max_workers=1, timeout=0.2)
+    (slow,) = scheduler.run(["slow"], lambda name: FakePipeline(release))
+    release.set()
+    deadline = time.monotonic() + 5
+    while slow.running and time.monotonic() < deadline:
+        time.sleep(0.05)
+    # 线程返回后不会把主线程判定的超时改写成 ok
+    assert slow.finished and not slow.running
+    assert slow.status == "timeout"
+
+
+def test_failure_is_isolated(release):
+    scheduler = PipelineScheduler(max_workers=2, timeout=5)
+    results = {r.name: r for r in scheduler.run(["bad", "fast"], lambda name: FakePipeline(release))}
+    assert results["bad"].status == "failed"
+    assert "RuntimeError: boom" in results["bad"].error
+    assert results["fast"].status == "ok"
+
+
+def test_result_running_state():
+    res = PipelineResult("x")
+    assert not res.running
+    res.started = 1.0
+    assert res.running
+    res.finished = True
+    assert not res.running
+
+
+class FakeScheduler:
+    def __init__(self, results):
+        self.results = results
+
+    def __call__(self, max_workers, timeout):
+        return self
+
+    def run(self, names, factory):
+        return self.results
+
+
+class FakeManager:
+    pruned = 0
+
+    def prune(self):
+        FakeManager.pruned += 1
+
+
+@pytest.mark.parametrize("running, pruned", [(True, 0), (False, 1)])
+def test_run_all_skips_prune_while_running(monkeypatch, running, pruned):
+    res = PipelineResult("slow", status="timeout", started=1.0, finished=not running)
+    monkeypatch.setattr(pipeline, "PipelineScheduler", FakeScheduler([res, PipelineResult("fast", "ok", finished=True)]))
+    monkeypatch.setattr(FakeManager, "pruned", 0)
+    monkeypatch.setattr(pipeline, "CacheManager", FakeManager)
+    pipeline.run_all(prune=True)
+    assert FakeManager.pruned == pruned
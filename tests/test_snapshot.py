@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("akshare")
+
+from api.routers.data import _parse_range, _sort_spec
+from api.services.data_service import code_index
+from api.services.snapshot import MarketSnapshot
+
+
+@pytest.fixture
+def snap():
+    raw = pd.DataFrame(
+        {
+            "代码": ["600000", "000001", "300750", "688981", "920050"],
+            "名称": ["浦发银行", "平安银行", "宁德时代", "中芯国际", "爱舍伦"],
+            "总市值": [3.5e11, 2.2e11, 1.1e12, 4.0e11, 3.0e9],
+            "市盈率-动态": np.array([7.15, 5.1, np.nan, 90.2, 30.42], dtype="float32"),
+        }
+    )
+    return MarketSnapshot(
+        day="2026-01-26",
+        raw=raw,
+        clean=raw,
+        version=1,
+        loaded_at=datetime.now(),
+        raw_index=code_index(raw),
+        clean_index=code_index(raw),
+    )
+
+
+def test_query_pages_in_sort_order(snap):
+    page, total = snap.query(["代码"], sort="-总市值", offset=0, limit=2)
+    assert total == 5
+    assert page["代码"].tolist() == ["300750", "688981"]
+    page, _ = snap.query(["代码"], sort="-总市值", offset=4, limit=2)
+    assert page["代码"].tolist() == ["920050"]
+
+
+def test_query_sort_caches_order(snap):
+    snap.query(["代码"], sort="市盈率-动态,代码")
+    assert "市盈率-动态,代码" in snap._orders
+    page, _ = snap.query(["代码"], sort="市盈率-动态,代码")
+    # 缺失值排在最后
+    assert page["代码"].tolist() == ["000001", "600000", "920050", "688981", "300750"]
+
+
+def test_query_range_filter(snap):
+    page, total = snap.query(["代码", "市盈率-动态"], ranges={"市盈率-动态": (None, 30.42)}, sort="代码")
+    # NaN 不满足任何区间；float32 列按上游小数位还原，30.42 落在上限内
+    assert total == 3
+    assert page["代码"].tolist() == ["000001", "600000", "920050"]
+    assert page["市盈率-动态"].tolist() == [5.1, 7.15, 30.42]
+
+
+def test_query_rejects_unknown_fields(snap):
+    with pytest.raises(ValueError, match="未知字段"):
+        snap.query(["代码", "不存在"])
+    with pytest.raises(ValueError, match="未知字段"):
+        snap.query(["代码"], ranges={"不存在": (0, 1)})
+    with pytest.raises(ValueError, match="未知排序字段"):
+        snap.query(["代码"], sort="-不存在")
+
+
+def test_parse_range():
+    assert _parse_range("市盈率::30") == ("市盈率-动态", (None, 30.0))
+    assert _parse_range("总市值:1e10:") == ("总市值", (1e10, None))
+    with pytest.raises(ValueError):
+        _parse_range("总市值:1e10")
+    with pytest.raises(ValueError):
+        _parse_range("总市值:abc:")
+
+
+def test_sort_spec_aliases():
+    assert _sort_spec("-市盈率, 代码") == "-市盈率-动态,代码"